@@ -14,11 +14,14 @@ import bcrypt
 import mysql.connector
 # … outros imports …
 from mediaDB_scraper import search_media, enrich_previews, healthcheck  # novo import para o modo Minha Base de Media
-from scraper import executar_scraper
+from scraper import executar_scraper_stream
 from scraper import get_site_name
+from browser_pool import warm_pool
+from varrimento import varrer_cliente
 import matplotlib.pyplot as plt
 from scraper_google import executar_scraper_google
 from scraper_google import rodar_scraper_sequencial
+from url_canonica import IndiceDedup
 from streamlit_option_menu import option_menu
 import multiprocessing
 multiprocessing.set_start_method("spawn", force=True)
@@ -32,6 +35,10 @@ import os
 load_dotenv()
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
 
+# Chromium quente em segundo plano para o primeiro scrape não pagar o arranque
+if os.getenv("BROWSER_WARMUP", "1") == "1":
+    warm_pool()
+
 if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
@@ -442,16 +449,51 @@ if menu == "Scraper" and role_name in ["admin", "account"]:
 
     # ---------- WEBSITE DIRETO ----------
     if modo_scraper == "Website Direto":
-        # Mantém a tua lógica atual tal como está abaixo (não alterado)
-        url = st.text_input("🌐 URL do site")
+        varrer_todas = st.checkbox("📚 Pesquisar em todas as medias da empresa", key="wd_varrer_todas")
+        url = None if varrer_todas else st.text_input("🌐 URL do site")
         keyword = st.text_input("🔍 Palavra-chave", value=keywords_atuais.split(",")[0] if keywords_atuais else "")
-        max_results = st.slider("Nº máximo de resultados", 1, 20, 5)
+        max_results = st.slider("Nº máximo de resultados" + (" por media" if varrer_todas else ""), 1, 20, 5)
 
         if st.button("🚀 Iniciar Scraper (Direto)"):
-            if url and keyword:
-                with st.spinner("A recolher dados...Vai beber um cafézinho ☕"):
-                    resultados = asyncio.run(executar_scraper(url, keyword, max_results))
-                    st.session_state["resultados_direto"] = resultados
+            if varrer_todas and keyword and cliente_id:
+                barra = st.progress(0.0, text="A preparar...")
+
+                def _progresso(feitos, total, site, n):
+                    barra.progress(feitos / total, text=f"{feitos}/{total} · {site} ({n} resultados)")
+
+                with st.spinner("A pesquisar em todas as medias da empresa..."):
+                    varrimento = asyncio.run(varrer_cliente(cliente_id, keyword.split(","), max_results, _progresso))
+                st.session_state["resultados_direto"] = [
+                    (r["titulo"], r["url"], r["site"]) for r in varrimento["resultados"]
+                ]
+                falhados = [s for s in varrimento["sites"] if s["estado"] != "ok"]
+                if not varrimento["sites"]:
+                    st.warning("⚠️ Esta empresa não tem medias com URL.")
+                elif falhados:
+                    st.info(f"{len(falhados)} de {len(varrimento['sites'])} pesquisas sem resposta (timeout/erro).")
+            elif url and keyword:
+                estado_ph = st.empty()
+                lista_ph = st.empty()
+
+                async def _consumir_stream():
+                    parciais = []
+                    finais = []
+                    estado_ph.info("A abrir o site...Vai beber um cafézinho ☕")
+                    async for ev in executar_scraper_stream(url, keyword, max_results):
+                        if ev["tipo"] == "pesquisa_submetida":
+                            estado_ph.info("🔎 Pesquisa submetida, a recolher links...")
+                        elif ev["tipo"] == "candidatos":
+                            estado_ph.info(f"🔗 {ev['candidatos']} links encontrados, a verificar {ev['a_visitar']} artigos...")
+                        elif ev["tipo"] == "resultado":
+                            parciais.append(ev["resultado"])
+                            lista_ph.markdown("\n".join(f"- [{t or l}]({l}) · {s}" for t, l, s in parciais))
+                        elif ev["tipo"] == "fim":
+                            finais = ev["resultados"]
+                    estado_ph.empty()
+                    lista_ph.empty()
+                    return finais
+
+                st.session_state["resultados_direto"] = asyncio.run(_consumir_stream())
             else:
                 st.warning("Preencha todos os campos.")
 
@@ -590,10 +632,11 @@ if menu == "Scraper" and role_name in ["admin", "account"]:
                 st.warning("Por favor, selecione ou crie um cliente antes de continuar.")
             else:
                 st.session_state["resultados_scraper"] = []
+                indice = IndiceDedup()  # artigos já visitados nesta pesquisa, entre keywords
                 for kw in [k.strip() for k in keyword.split(",") if k.strip()]:
                     with st.spinner(f"A recolher dados para {kw} ☕"):
                         try:
-                            resultados_kw = executar_scraper_google(kw, filtro_tempo)
+                            resultados_kw = executar_scraper_google(kw, filtro_tempo, indice)
                             st.session_state["resultados_scraper"].append({
                                 "keyword": kw,
                                 "resultados": resultados_kw
@@ -615,10 +658,14 @@ if menu == "Scraper" and role_name in ["admin", "account"]:
                 site_name = resultado.get("site", "Desconhecido")
                 titulo = resultado.get("titulo", "Sem título")
                 data_pub = resultado.get("data", "N/D")
+                if resultado.get("publicado_em"):
+                    data_pub = f"{resultado['publicado_em']} ({data_pub})"
 
                 with st.expander(f"Notícia {i + 1}"):
                     st.markdown(f"**Título:** {titulo}")
-                    st.markdown(f"**Nome do Site:** {site_name}")
+                    st.markdown(f"**Nome do Site:** {resultado.get('publicador') or site_name}")
+                    if resultado.get("autor"):
+                        st.markdown(f"**✍️ Autor:** {resultado['autor']}")
                     st.markdown(f"**🕒 Data de Publicação:** {data_pub}")
                     st.markdown(f"[🌐 Abrir Link]({link})", unsafe_allow_html=True)
 
@@ -0,0 +1,138 @@
+import logging
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger("scraper")
+
+# Extensões usadas no bloqueio ao nível do CDP (o CDP não filtra por resource_type)
+EXTENSOES_IMAGEM = ["png", "jpg", "jpeg", "gif", "webp", "avif", "bmp", "ico"]
+EXTENSOES_MEDIA = ["mp4", "webm", "m3u8", "ts", "mp3", "m4a", "ogg", "wav"]
+EXTENSOES_FONTE = ["woff", "woff2", "ttf", "otf", "eot"]
+
+
+class ContadoresPagina:
+    """Pedidos/bytes permitidos e bloqueados numa página."""
+
+    def __init__(self, url: str = ""):
+        self.url = url
+        self.permitidos = 0
+        self.bytes_permitidos = 0
+        self.bloqueados = 0
+        self.falhados = 0
+
+    def resumo(self) -> str:
+        return (f"permitidos={self.permitidos} ({self.bytes_permitidos / 1024:.0f} KB) | "
+                f"bloqueados={self.bloqueados} | falhados={self.falhados}")
+
+
+class BloqueioPedidos:
+    """
+    Motor de bloqueio compilado uma vez por processo.
+    - Chromium: lista de padrões entregue ao CDP (Network.setBlockedURLs), por isso os
+      pedidos bloqueados nunca chegam ao Python; os contadores vêm de eventos CDP.
+    - Outros browsers / falha do CDP: route por página com lookup de host em conjunto
+      de sufixos (O(nº de labels) em vez de varrer a lista toda).
+    """
+
+    def __init__(self, ad_hosts: Iterable[str], block_images: bool, block_media: bool,
+                 block_fonts: bool, block_ads: bool):
+        self.hosts = set()
+        self.host_paths = {}
+        if block_ads:
+            for hint in ad_hosts:
+                host, _, path = hint.partition("/")
+                if path:
+                    self.host_paths.setdefault(host, []).append("/" + path)
+                else:
+                    self.hosts.add(host)
+
+        self.tipos = set()
+        extensoes: List[str] = []
+        if block_images:
+            self.tipos.add("image")
+            extensoes += EXTENSOES_IMAGEM
+        if block_media:
+            self.tipos.add("media")
+            extensoes += EXTENSOES_MEDIA
+        if block_fonts:
+            self.tipos.add("font")
+            extensoes += EXTENSOES_FONTE
+
+        padroes = []
+        for host in sorted(self.hosts):
+            padroes += [f"*://{host}/*", f"*://*.{host}/*"]
+        for host, paths in sorted(self.host_paths.items()):
+            for path in paths:
+                padroes += [f"*://{host}{path}*", f"*://*.{host}{path}*"]
+        for ext in extensoes:
+            padroes += [f"*.{ext}", f"*.{ext}?*"]
+        self.padroes_cdp = padroes
+
+    def host_bloqueado(self, host: str, path: str = "") -> bool:
+        partes = (host or "").lower().split(":")[0].split(".")
+        for i in range(len(partes) - 1):
+            sufixo = ".".join(partes[i:])
+            if sufixo in self.hosts:
+                return True
+            prefixos = self.host_paths.get(sufixo)
+            if prefixos and any(path.startswith(p) for p in prefixos):
+                return True
+        return False
+
+    def bloquear(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.tipos:
+            return True
+        p = urlparse(url)
+        return self.host_bloqueado(p.netloc, p.path)
+
+    async def instalar(self, context, page, url: str = "") -> ContadoresPagina:
+        """Ativa o bloqueio na página e devolve os contadores que vão sendo atualizados."""
+        contadores = ContadoresPagina(url)
+        try:
+            cdp = await context.new_cdp_session(page)
+            cdp.on("Network.loadingFinished", lambda ev: _finished(contadores, ev))
+            cdp.on("Network.loadingFailed", lambda ev: _failed(contadores, ev))
+            await cdp.send("Network.enable")
+            if self.padroes_cdp:
+                await cdp.send("Network.setBlockedURLs", {"urls": self.padroes_cdp})
+            return contadores
+        except Exception as e:
+            logger.debug(f"[BLOCK] CDP indisponível ({e}); a usar route.")
+
+        async def route_handler(route, request):
+            try:
+                if self.bloquear(request.url, request.resource_type):
+                    contadores.bloqueados += 1
+                    return await route.abort()
+                contadores.permitidos += 1
+                return await route.continue_()
+            except Exception:
+                try:
+                    await route.continue_()
+                except Exception:
+                    pass
+
+        await page.route("**/*", route_handler)
+        return contadores
+
+
+def _finished(contadores: ContadoresPagina, ev: dict):
+    contadores.permitidos += 1
+    contadores.bytes_permitidos += int(ev.get("encodedDataLength") or 0)
+
+
+def _failed(contadores: ContadoresPagina, ev: dict):
+    if ev.get("blockedReason"):
+        contadores.bloqueados += 1
+    else:
+        contadores.falhados += 1
+
+
+_motor: Optional[BloqueioPedidos] = None
+
+
+def obter_motor(ad_hosts, block_images, block_media, block_fonts, block_ads) -> BloqueioPedidos:
+    global _motor
+    if _motor is None:
+        _motor = BloqueioPedidos(ad_hosts, block_images, block_media, block_fonts, block_ads)
+    return _motor
@@ -0,0 +1,357 @@
+import asyncio
+import atexit
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from importlib.metadata import PackageNotFoundError, version as pkg_version
+from typing import Optional
+
+from playwright._impl._errors import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+# ========= CONFIG =========
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))                # nº de Chromium quentes
+POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "150"))     # reciclar browser após N páginas abertas
+POOL_MAX_RSS_MB = int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1500"))  # teto de memória (PSS) do driver Playwright + Chromium; 0 = sem teto
+POOL_MEM_CHECK_S = float(os.getenv("BROWSER_POOL_MEM_CHECK_S", "10"))  # intervalo mínimo entre medições de memória
+INSTALL_MARKER_DIR = os.getenv("PLAYWRIGHT_MARKER_DIR", ".playwright_marker")  # marca "Chromium verificado" por versão
+
+# Browsers do Playwright dentro do pacote/projeto (tem de estar definido antes de arrancar o driver)
+os.environ.setdefault("PLAYWRIGHT_BROWSERS_PATH", "0")
+
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--no-default-browser-check",
+    "--no-first-run",
+    "--disable-features=Translate",
+    "--blink-settings=imagesEnabled=false"
+]
+
+logger = logging.getLogger("scraper")
+
+
+def _memoria_kb(pid: int, page_kb: int) -> int:
+    # PSS reparte as páginas partilhadas entre os processos do Chromium; sem smaps_rollup usa RSS
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for linha in f:
+                if linha.startswith("Pss:"):
+                    return int(linha.split()[1])
+    except Exception:
+        pass
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * page_kb
+    except Exception:
+        return 0
+
+
+def _playwright_pss_mb() -> float:
+    """Soma a memória (PSS, MB) do driver Playwright deste processo e dos seus descendentes
+    (os Chromium do pool). Outros filhos (ex.: o Chrome do scraper Google) não contam.
+    Fora de Linux devolve 0 e o teto fica inativo."""
+    if not os.path.isdir("/proc"):
+        return 0.0
+    parents = {}
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                stat = f.read()
+            # o nome do processo pode ter espaços: ppid vem depois do último ')'
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            parents.setdefault(ppid, []).append(int(pid))
+        except Exception:
+            continue
+    drivers = []
+    for pid in parents.get(os.getpid(), []):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"run-driver" in f.read():
+                    drivers.append(pid)
+        except Exception:
+            continue
+    page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+    total_kb = 0
+    stack = drivers
+    while stack:
+        pid = stack.pop()
+        stack.extend(parents.get(pid, []))
+        total_kb += _memoria_kb(pid, page_kb)
+    return total_kb / 1024.0
+
+
+_install_ok = False
+_install_lock = threading.Lock()
+
+
+def _playwright_version() -> str:
+    try:
+        return pkg_version("playwright")
+    except PackageNotFoundError:
+        return "desconhecida"
+
+
+def _marker_path() -> str:
+    return os.path.join(INSTALL_MARKER_DIR, f"chromium-{_playwright_version()}.ok")
+
+
+def ensure_playwright_browsers_installed(executable_path: Optional[str] = None) -> bool:
+    """
+    Garante o Chromium do Playwright uma vez por processo. A verificação fica
+    registada num ficheiro marcador por versão do Playwright, por isso só uma
+    atualização do pacote volta a lançar `playwright install`.
+    """
+    global _install_ok
+    if _install_ok:
+        return True
+    with _install_lock:
+        if _install_ok:
+            return True
+        marker = _marker_path()
+        if os.path.exists(marker) and (executable_path is None or os.path.exists(executable_path)):
+            _install_ok = True
+            return True
+
+        if executable_path is None or not os.path.exists(executable_path):
+            t0 = time.perf_counter()
+            logger.info(f"[POOL] Chromium do Playwright {_playwright_version()} em falta; a instalar...")
+            try:
+                subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+            except Exception as e:
+                logger.error(f"[POOL] Falha a instalar o Chromium: {e}")
+                return False
+            logger.info(f"[POOL] Chromium instalado em {(time.perf_counter() - t0):.1f}s.")
+
+        try:
+            os.makedirs(INSTALL_MARKER_DIR, exist_ok=True)
+            with open(marker, "w") as f:
+                f.write(executable_path or "")
+        except OSError as e:
+            logger.debug(f"[POOL] Não foi possível gravar o marcador {marker}: {e}")
+        _install_ok = True
+        return True
+
+
+class _BrowserSlot:
+    def __init__(self, idx: int):
+        self.idx = idx
+        self.browser = None
+        self.pages_served = 0
+        self.active_contexts = 0
+        self.retiring = False
+
+    def alive(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Pool de Chromium quentes partilhado pelo processo.
+    Os browsers arrancam só quando são precisos; cada job recebe um contexto novo
+    (isolado) num browser já lançado. Um browser é reciclado quando ultrapassa
+    POOL_MAX_PAGES páginas servidas ou quando a memória (PSS) do driver Playwright e dos
+    seus Chromium passa POOL_MAX_RSS_MB.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = POOL_MAX_PAGES, max_rss_mb: int = POOL_MAX_RSS_MB):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._playwright = None
+        self._ultima_medicao = 0.0
+        self._slots = [_BrowserSlot(i) for i in range(self.size)]
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_playwright(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            await asyncio.to_thread(ensure_playwright_browsers_installed, self._playwright.chromium.executable_path)
+            logger.info(f"[POOL] Playwright iniciado (browsers={self.size}, max_pages={self.max_pages}, max_rss_mb={self.max_rss_mb})")
+
+    async def _launch(self, slot: _BrowserSlot):
+        await self._ensure_playwright()
+        try:
+            slot.browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        except PlaywrightError as e:
+            logger.error(f"Falha a lançar o Chromium: {e}")
+            raise
+        slot.pages_served = 0
+        slot.retiring = False
+        logger.info(f"[POOL] Chromium #{slot.idx} lançado.")
+
+    async def _close_slot(self, slot: _BrowserSlot):
+        browser, slot.browser = slot.browser, None
+        slot.retiring = False
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            logger.info(f"[POOL] Chromium #{slot.idx} fechado (páginas servidas: {slot.pages_served}).")
+
+    async def _pick_slot(self) -> _BrowserSlot:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            candidatos = [s for s in self._slots if not s.retiring] or self._slots
+            slot = min(candidatos, key=lambda s: (s.active_contexts, s.pages_served))
+            if not slot.alive():
+                if slot.browser is not None:
+                    await self._close_slot(slot)
+                await self._launch(slot)
+            slot.active_contexts += 1
+            return slot
+
+    def _count_page(self, slot: _BrowserSlot):
+        slot.pages_served += 1
+        if self.max_pages and slot.pages_served >= self.max_pages:
+            slot.retiring = True
+
+    async def _release(self, slot: _BrowserSlot):
+        slot.active_contexts -= 1
+        if not slot.retiring and self.max_rss_mb and time.monotonic() - self._ultima_medicao >= POOL_MEM_CHECK_S:
+            self._ultima_medicao = time.monotonic()
+            # percorrer /proc leva tempo: fora do loop partilhado para não parar os outros jobs
+            pss = await asyncio.to_thread(_playwright_pss_mb)
+            if pss > self.max_rss_mb:
+                logger.info(f"[POOL] PSS {pss:.0f}MB acima do teto ({self.max_rss_mb}MB); reciclar Chromium #{slot.idx}.")
+                slot.retiring = True
+        if slot.retiring and slot.active_contexts <= 0:
+            await self._close_slot(slot)
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        """Empresta um contexto novo num browser quente; fecha-o à saída."""
+        slot = await self._pick_slot()
+        context = None
+        try:
+            context = await slot.browser.new_context(**context_kwargs)
+            context.on("page", lambda _page: self._count_page(slot))
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._release(slot)
+
+    async def warm(self, n: int = 1):
+        """Lança até n browsers já, para que o primeiro job não pague o arranque."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            for slot in self._slots[:max(1, n)]:
+                if not slot.alive():
+                    await self._launch(slot)
+
+    async def close(self):
+        for slot in self._slots:
+            await self._close_slot(slot)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+# ========= LOOP DEDICADO =========
+# O Playwright async fica preso ao event loop onde arrancou. Como o Streamlit faz
+# asyncio.run() a cada clique, o pool vive num loop próprio numa thread daemon e
+# os jobs são lá executados via run_pooled().
+_pool: Optional[BrowserPool] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def get_pool() -> BrowserPool:
+    """Devolve o pool do processo. Só deve ser usado dentro do loop do pool."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+
+async def run_pooled(coro):
+    """Executa `coro` no loop do pool (onde vivem os browsers) e espera pelo resultado."""
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+_warm_future = None
+
+
+def warm_pool(n: int = 1, wait: bool = False, timeout: float = 60.0):
+    """
+    Aquece o pool do processo em segundo plano (idempotente). Com wait=True
+    bloqueia até os browsers estarem lançados.
+    """
+    global _warm_future
+    if _warm_future is None or (_warm_future.done() and _warm_future.exception() is not None):
+        _warm_future = asyncio.run_coroutine_threadsafe(get_pool().warm(n), _get_loop())
+    if wait:
+        try:
+            _warm_future.result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"[POOL] Aquecimento falhou: {e}")
+
+
+def shutdown_pool(timeout: float = 15.0):
+    global _pool
+    if _pool is None or _loop is None or _loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_pool.close(), _loop).result(timeout=timeout)
+    except Exception:
+        pass
+    _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+async def _aquecer_container():
+    t0 = time.perf_counter()
+    pool = BrowserPool(size=1)
+    try:
+        await pool.warm(1)
+    finally:
+        await pool.close()
+    logger.info(f"[POOL] Warm-up concluído em {(time.perf_counter() - t0):.1f}s.")
+
+
+if __name__ == "__main__":
+    # Arranque do container: verifica/instala o Chromium, grava o marcador e
+    # lança+fecha um browser para deixar binários e caches do disco quentes.
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(_aquecer_container())
@@ -0,0 +1,207 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from leitor_html import encoding_da_resposta
+
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite").strip()   # vazio = sem cache
+HTTP_CACHE_TTL_S = int(os.getenv("HTTP_CACHE_TTL_S", str(6 * 3600)))           # resposta servida sem revalidar
+HTTP_CACHE_MAX_AGE_S = int(os.getenv("HTTP_CACHE_MAX_AGE_S", str(7 * 86400)))   # depois disto a entrada é apagada
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "200"))                  # tamanho máximo (corpos comprimidos)
+LIMPEZA_CADA = 200  # escritas entre limpezas por idade/tamanho
+
+logger = logging.getLogger("scraper")
+
+
+def chave_url(url: str) -> str:
+    """Chave da cache: esquema/host em minúsculas, sem porta por omissão, sem fragmento e query ordenada."""
+    p = urlparse((url or "").strip())
+    esquema = (p.scheme or "http").lower()
+    host = (p.hostname or "").lower()
+    if p.port and not ((esquema == "http" and p.port == 80) or (esquema == "https" and p.port == 443)):
+        host = f"{host}:{p.port}"
+    query = urlencode(sorted(parse_qsl(p.query, keep_blank_values=True)))
+    return urlunparse((esquema, host, p.path or "/", p.params, query, ""))
+
+
+class EntradaCache:
+    def __init__(self, url, corpo, content_type, etag, last_modified, completo, guardado_em):
+        self.url = url
+        self.corpo = corpo
+        self.content_type = content_type or ""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.completo = bool(completo)   # False = só o início do documento (download parado cedo)
+        self.guardado_em = guardado_em
+
+    @property
+    def fresca(self) -> bool:
+        return time.time() - self.guardado_em <= HTTP_CACHE_TTL_S
+
+    def cabecalhos_condicionais(self) -> Dict[str, str]:
+        # só faz sentido revalidar um corpo completo: um 304 não traz o resto do documento
+        if not self.completo:
+            return {}
+        h = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+    def texto(self) -> str:
+        return self.corpo.decode(encoding_da_resposta(self.content_type, self.corpo[:4096]), errors="ignore")
+
+
+class CacheHTTP:
+    """
+    Cache de respostas HTTP em SQLite (corpos comprimidos com zlib), partilhada entre
+    keywords, clientes e runs. Entradas frescas (HTTP_CACHE_TTL_S) servem-se sem rede;
+    as restantes revalidam-se com ETag/Last-Modified. Limpeza por idade
+    (HTTP_CACHE_MAX_AGE_S) e por tamanho (HTTP_CACHE_MAX_MB, menos usadas primeiro).
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._escritas = 0
+        self.stats = {"hit": 0, "revalidado": 0, "miss": 0, "guardado": 0}
+        pasta = os.path.dirname(path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    corpo BLOB,
+                    tamanho INTEGER,
+                    completo INTEGER,
+                    guardado_em REAL,
+                    usado_em REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_usado ON respostas (usado_em)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _contar(self, chave: str):
+        with self._lock:
+            self.stats[chave] += 1
+
+    def obter(self, url: str) -> Optional[EntradaCache]:
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT content_type, etag, last_modified, corpo, completo, guardado_em FROM respostas WHERE chave = ?",
+                (chave_url(url),)
+            ).fetchone()
+            if not row:
+                self._contar("miss")
+                return None
+            with conn:
+                conn.execute("UPDATE respostas SET usado_em = ? WHERE chave = ?", (time.time(), chave_url(url)))
+            return EntradaCache(url, zlib.decompress(row[3]), row[0], row[1], row[2], row[4], row[5])
+        except Exception as e:
+            logger.debug(f"[HTTP-CACHE] Falha a ler {url}: {e}")
+            self._contar("miss")
+            return None
+
+    def hit(self, revalidado: bool = False):
+        self._contar("revalidado" if revalidado else "hit")
+
+    def guardar(self, url: str, corpo: bytes, content_type: str, etag: Optional[str],
+                last_modified: Optional[str], completo: bool):
+        if not corpo:
+            return
+        try:
+            comprimido = zlib.compress(corpo, 6)
+            agora = time.time()
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO respostas "
+                    "(chave, content_type, etag, last_modified, corpo, tamanho, completo, guardado_em, usado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (chave_url(url), content_type, etag, last_modified, comprimido, len(comprimido),
+                     1 if completo else 0, agora, agora)
+                )
+            self._contar("guardado")
+            with self._lock:
+                self._escritas += 1
+                limpar = self._escritas % LIMPEZA_CADA == 0
+            if limpar:
+                self.limpar()
+        except Exception as e:
+            logger.debug(f"[HTTP-CACHE] Falha a guardar {url}: {e}")
+
+    def renovar(self, url: str):
+        """Resposta 304: a entrada volta a contar como fresca."""
+        try:
+            conn = self._conn()
+            with conn:
+                agora = time.time()
+                conn.execute("UPDATE respostas SET guardado_em = ?, usado_em = ? WHERE chave = ?",
+                             (agora, agora, chave_url(url)))
+        except Exception as e:
+            logger.debug(f"[HTTP-CACHE] Falha a renovar {url}: {e}")
+
+    def limpar(self):
+        """Apaga entradas mais velhas que HTTP_CACHE_MAX_AGE_S e, acima de HTTP_CACHE_MAX_MB, as menos usadas."""
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM respostas WHERE guardado_em < ?", (time.time() - HTTP_CACHE_MAX_AGE_S,))
+                total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+                limite = HTTP_CACHE_MAX_MB * 1024 * 1024
+                if total > limite:
+                    # corta até 90% do limite para não limpar a cada escrita
+                    excesso = total - int(limite * 0.9)
+                    apagar = []
+                    for chave, tamanho in conn.execute("SELECT chave, tamanho FROM respostas ORDER BY usado_em"):
+                        apagar.append((chave,))
+                        excesso -= tamanho
+                        if excesso <= 0:
+                            break
+                    conn.executemany("DELETE FROM respostas WHERE chave = ?", apagar)
+                    logger.info(f"[HTTP-CACHE] {len(apagar)} entradas removidas (limite {HTTP_CACHE_MAX_MB} MB).")
+        except Exception as e:
+            logger.debug(f"[HTTP-CACHE] Falha na limpeza: {e}")
+
+    def resumo(self) -> str:
+        s = dict(self.stats)
+        return f"hits={s['hit']} | revalidados(304)={s['revalidado']} | misses={s['miss']} | guardados={s['guardado']}"
+
+
+_cache: Optional[CacheHTTP] = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache() -> Optional[CacheHTTP]:
+    """Cache do processo, ou None se HTTP_CACHE_PATH estiver vazio ou a base não abrir."""
+    global _cache
+    if not HTTP_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = CacheHTTP(HTTP_CACHE_PATH)
+            except Exception as e:
+                logger.warning(f"[HTTP-CACHE] Cache desativada ({e}).")
+                return None
+        return _cache
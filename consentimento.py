@@ -0,0 +1,66 @@
+import logging
+import os
+import re
+import time
+from typing import Optional
+
+STORAGE_STATE_DIR = os.getenv("STORAGE_STATE_DIR", "storage_states")          # um JSON de storage_state por domínio
+STORAGE_STATE_TTL_H = float(os.getenv("STORAGE_STATE_TTL_H", "72"))          # validade do estado guardado (horas)
+
+# cookies/chaves de localStorage que os CMPs comuns gravam depois do consentimento
+CONSENT_RE = re.compile(
+    r"euconsent|optanon|cookieconsent|cookie_consent|cookielawinfo|didomi|consentuuid|cmplz_|"
+    r"__cmpc|_sp_|borlabs|usprivacy|gdpr|tc_privacy|cookie-agreed|truste",
+    re.IGNORECASE,
+)
+
+logger = logging.getLogger("scraper")
+
+
+def caminho_estado(dominio: str) -> str:
+    nome = re.sub(r"[^a-z0-9.\-]", "_", (dominio or "site").lower())
+    return os.path.join(STORAGE_STATE_DIR, f"{nome}.json")
+
+
+def carregar_estado(dominio: str) -> Optional[str]:
+    """Caminho do storage_state do domínio se existir e ainda estiver dentro do TTL."""
+    path = caminho_estado(dominio)
+    try:
+        idade_h = (time.time() - os.path.getmtime(path)) / 3600.0
+    except OSError:
+        return None
+    if idade_h > STORAGE_STATE_TTL_H:
+        logger.info(f"[CONSENT] Estado de {dominio} expirado ({idade_h:.0f}h).")
+        return None
+    return path
+
+
+async def tem_consentimento(context) -> bool:
+    """True se o contexto já tem cookies ou localStorage de consentimento de um CMP."""
+    try:
+        estado = await context.storage_state()
+    except Exception:
+        return False
+    nomes = [c.get("name", "") for c in estado.get("cookies", [])]
+    for origem in estado.get("origins", []):
+        nomes += [item.get("name", "") for item in origem.get("localStorage", [])]
+    return any(CONSENT_RE.search(n) for n in nomes)
+
+
+async def guardar_estado(context, dominio: str) -> bool:
+    """Grava o storage_state do contexto (cookies + localStorage) para o domínio."""
+    path = caminho_estado(dominio)
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(STORAGE_STATE_DIR, exist_ok=True)
+        await context.storage_state(path=tmp)
+        os.replace(tmp, path)
+        logger.info(f"[CONSENT] Estado guardado para {dominio}.")
+        return True
+    except Exception as e:
+        logger.warning(f"[CONSENT] Falha a guardar estado de {dominio}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
@@ -15,6 +15,17 @@ def get_connection():
         database=os.getenv("DB_NAME")
     )
 
+# Função para fechar cursor e ligação (aceita None)
+def fechar_ligacao(conn, cursor=None):
+    if cursor is not None:
+        cursor.close()
+    if conn is not None:
+        if hasattr(conn, "is_connected"):
+            if conn.is_connected():
+                conn.close()
+        else:
+            conn.close()
+
 # Função para garantir que as roles existem
 def garantir_roles_existem():
     """
@@ -53,6 +64,46 @@ def garantir_roles_existem():
             else:
                 conn.close()
 
+# Função para garantir a coluna url_chave em noticias_sugeridas
+def garantir_url_chave_noticias():
+    """
+    Bases criadas antes de url_chave: acrescenta a coluna (UNIQUE) e preenche-a uma vez
+    com o hash do URL canónico. Linhas que são variantes de um artigo já presente ficam a NULL.
+    """
+    from url_canonica import hash_url
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SHOW COLUMNS FROM noticias_sugeridas LIKE 'url_chave'")
+        if cursor.fetchone() is not None:
+            return  # já migrada: guardar_noticia preenche url_chave em todas as linhas novas
+
+        cursor.execute("ALTER TABLE noticias_sugeridas ADD COLUMN url_chave CHAR(40) NULL AFTER url")
+        cursor.execute("ALTER TABLE noticias_sugeridas ADD UNIQUE KEY uq_noticias_url_chave (url_chave)")
+        print("✅ Coluna \'url_chave\' adicionada a noticias_sugeridas.")
+
+        # preenchimento feito uma única vez, junto com a criação da coluna
+        cursor.execute("SELECT id, url FROM noticias_sugeridas WHERE url IS NOT NULL ORDER BY id")
+        preenchidas = 0
+        for id_noticia, url in cursor.fetchall():
+            try:
+                cursor.execute("UPDATE noticias_sugeridas SET url_chave = %s WHERE id = %s", (hash_url(url), id_noticia))
+                preenchidas += 1
+            except mysql.connector.IntegrityError:
+                pass  # variante de uma notícia mais antiga
+        conn.commit()
+        print(f"✅ url_chave preenchida em {preenchidas} notícias sugeridas.")
+
+    except Error as e:
+        print(f"❌ Erro ao garantir url_chave: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        fechar_ligacao(conn, cursor)
+
 # Função para verificar se uma tabela existe
 def tabela_existe(cursor, nome_tabela):
     """
@@ -148,11 +199,32 @@ def criar_tabelas():
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     titulo TEXT,
                     url TEXT UNIQUE,
+                    url_chave CHAR(40) UNIQUE,
                     data TEXT,
                     keyword TEXT,
                     cliente_id INT,
                     site TEXT
                 );
+                """,
+                "receitas_pesquisa": """
+                CREATE TABLE IF NOT EXISTS receitas_pesquisa (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    dominio VARCHAR(255) UNIQUE NOT NULL,
+                    estrategia VARCHAR(50),
+                    seletor_abrir TEXT,
+                    seletor_input TEXT,
+                    url_template TEXT,
+                    ultimo_sucesso TIMESTAMP NULL,
+                    sucessos INT DEFAULT 0
+                );
+                """,
+                "feeds_site": """
+                CREATE TABLE IF NOT EXISTS feeds_site (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    dominio VARCHAR(255) UNIQUE NOT NULL,
+                    feeds TEXT,
+                    verificado_em TIMESTAMP NULL
+                );
                 """
             }
 
@@ -181,6 +253,8 @@ def criar_tabelas():
             # Garantir que as roles existem após criar as tabelas
             if "roles" in tabelas_criadas:
                 garantir_roles_existem()
+            if "noticias_sugeridas" in tabelas_criadas:
+                garantir_url_chave_noticias()
             
             # Se chegou até aqui, sucesso!
             break
@@ -215,7 +289,7 @@ def verificar_integridade_bd():
         conn = get_connection()
         cursor = conn.cursor()
         
-        tabelas_necessarias = ["roles", "users", "clientes", "media", "results", "logs", "noticias_sugeridas"]
+        tabelas_necessarias = ["roles", "users", "clientes", "media", "results", "logs", "noticias_sugeridas", "receitas_pesquisa", "feeds_site"]
         tabelas_existentes = []
         tabelas_em_falta = []
         
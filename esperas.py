@@ -0,0 +1,66 @@
+import os
+import time
+from typing import Optional
+
+SITE_WAIT_BUDGET_MS = int(os.getenv("SITE_WAIT_BUDGET_MS", "15000"))  # tempo total de esperas por site/run
+
+
+class OrcamentoEspera:
+    """
+    Orçamento de espera de uma run num site. Cada espera usa no máximo
+    min(teto, restante); esgotado o orçamento, as esperas deixam de bloquear.
+    """
+
+    def __init__(self, total_ms: int = SITE_WAIT_BUDGET_MS):
+        self.total_ms = total_ms
+        self.gasto_ms = 0.0
+
+    def timeout(self, teto_ms: int) -> int:
+        return int(max(0.0, min(teto_ms, self.total_ms - self.gasto_ms)))
+
+    def gastar(self, ms: float):
+        self.gasto_ms += ms
+
+
+async def _esperar(orcamento: Optional[OrcamentoEspera], teto_ms: int, fn) -> bool:
+    orc = orcamento or OrcamentoEspera()
+    timeout = orc.timeout(teto_ms)
+    # timeout=0 no Playwright significa "sem limite": com o orçamento esgotado não se espera
+    if timeout <= 0:
+        return False
+    t0 = time.perf_counter()
+    try:
+        return (await fn(timeout)) is not False
+    except Exception:
+        return False
+    finally:
+        orc.gastar((time.perf_counter() - t0) * 1000)
+
+
+async def esperar_seletor(page, seletor: str, teto_ms: int, orcamento: Optional[OrcamentoEspera] = None,
+                          estado: str = "visible") -> bool:
+    """Espera que o seletor apareça (ou atinja `estado`)."""
+    return await _esperar(orcamento, teto_ms, lambda t: page.wait_for_selector(seletor, state=estado, timeout=t))
+
+
+async def esperar_oculto(elemento, teto_ms: int, orcamento: Optional[OrcamentoEspera] = None) -> bool:
+    """Espera que um elemento (ex.: botão do popup) fique oculto/removido."""
+    return await _esperar(orcamento, teto_ms, lambda t: elemento.wait_for_element_state("hidden", timeout=t))
+
+
+async def esperar_url_diferente(page, url_antes: str, teto_ms: int, orcamento: Optional[OrcamentoEspera] = None) -> bool:
+    """Espera que a página navegue para outro URL."""
+    return await _esperar(orcamento, teto_ms, lambda t: page.wait_for_url(lambda u: u != url_antes, timeout=t,
+                                                                        wait_until="domcontentloaded"))
+
+
+async def esperar_mais_elementos(page, seletor: str, n_antes: int, teto_ms: int,
+                                 orcamento: Optional[OrcamentoEspera] = None) -> bool:
+    """Espera que existam mais de n_antes elementos para o seletor (ex.: lista expandida)."""
+    return await _esperar(orcamento, teto_ms, lambda t: page.wait_for_function(
+        "([s, n]) => document.querySelectorAll(s).length > n", arg=[seletor, n_antes], timeout=t))
+
+
+async def esperar_rede_quieta(page, teto_ms: int, orcamento: Optional[OrcamentoEspera] = None) -> bool:
+    """Espera por uma janela sem pedidos de rede (networkidle)."""
+    return await _esperar(orcamento, teto_ms, lambda t: page.wait_for_load_state("networkidle", timeout=t))
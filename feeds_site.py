@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+import feedparser
+from bs4 import BeautifulSoup
+
+from database import fechar_ligacao, get_connection
+from scraper_http import HTTP_MAX_BYTES
+
+FEED_CACHE_TTL_H = float(os.getenv("FEED_CACHE_TTL_H", "168"))       # validade dos feeds descobertos (horas)
+FEED_NEG_TTL_H = float(os.getenv("FEED_NEG_TTL_H", "24"))            # validade de "site sem feeds" (horas)
+FEED_MAX_FEEDS = int(os.getenv("FEED_MAX_FEEDS", "6"))               # máximo de feeds guardados/lidos por site
+FEED_MAX_SITEMAPS_INDEX = int(os.getenv("FEED_MAX_SITEMAPS_INDEX", "4"))  # filhos de um sitemap index a testar
+
+CAMINHOS_COMUNS = [
+    "/feed", "/rss", "/rss.xml", "/feed.xml", "/atom.xml", "/index.xml", "/feed/rss",
+    "/news-sitemap.xml", "/sitemap-news.xml", "/sitemap_news.xml", "/sitemaps/news.xml",
+]
+TIPOS_FEED = ("application/rss+xml", "application/atom+xml", "application/feed+json", "application/xml", "text/xml")
+NS_SITEMAP = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+NS_NEWS = "{http://www.google.com/schemas/sitemap-news/0.9}"
+
+logger = logging.getLogger("scraper")
+
+
+# ========= CACHE POR DOMÍNIO =========
+def obter_feeds(dominio: str) -> Optional[List[str]]:
+    """
+    Feeds guardados para o domínio: lista (vazia = site sem feeds, ainda válido)
+    ou None quando não há registo ou o registo expirou. Nunca lança.
+    """
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT feeds, TIMESTAMPDIFF(MINUTE, verificado_em, NOW()) FROM feeds_site WHERE dominio = %s LIMIT 1",
+            (dominio,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        feeds = json.loads(row[0] or "[]")
+        idade_h = (row[1] or 0) / 60.0
+        if idade_h > (FEED_CACHE_TTL_H if feeds else FEED_NEG_TTL_H):
+            return None
+        return feeds
+    except Exception as e:
+        logger.warning(f"[FEEDS] Falha a ler feeds de {dominio}: {e}")
+        return None
+    finally:
+        fechar_ligacao(conn, cursor)
+
+
+def guardar_feeds(dominio: str, feeds: List[str]) -> bool:
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO feeds_site (dominio, feeds, verificado_em)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE feeds = VALUES(feeds), verificado_em = NOW()
+        """, (dominio, json.dumps(feeds)))
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"[FEEDS] Falha a guardar feeds de {dominio}: {e}")
+        return False
+    finally:
+        fechar_ligacao(conn, cursor)
+
+
+# ========= DESCOBERTA =========
+async def _obter_texto(session: aiohttp.ClientSession, url: str, max_bytes: int = HTTP_MAX_BYTES) -> Optional[str]:
+    """GET simples (aceita text/plain, XML e HTML); None em erro."""
+    try:
+        async with session.get(url, allow_redirects=True, ssl=False) as resp:
+            if resp.status >= 400:
+                return None
+            chunks = []
+            total = 0
+            async for chunk in resp.content.iter_chunked(8192):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total >= max_bytes:
+                    break
+            data = b"".join(chunks)
+            try:
+                encoding = resp.get_encoding()
+            except Exception:
+                encoding = "utf-8"
+            return data.decode(encoding or "utf-8", errors="ignore")
+    except Exception as e:
+        logger.debug(f"[FEEDS] Falha a obter {url}: {e}")
+        return None
+
+
+def _links_alternate(html: str, base_url: str) -> List[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    out = []
+    for link in soup.find_all("link", href=True):
+        rel = " ".join(link.get("rel") or []).lower()
+        tipo = (link.get("type") or "").lower()
+        if "alternate" in rel and tipo in TIPOS_FEED:
+            out.append(urljoin(base_url, link["href"]))
+    return out
+
+
+def _sitemaps_robots(robots: str) -> List[str]:
+    return [m.group(1).strip() for m in re.finditer(r"(?im)^\s*sitemap:\s*(\S+)", robots or "")]
+
+
+def _tipo_documento(texto: str) -> Optional[str]:
+    """'feed', 'news_sitemap', 'sitemap_index' ou None."""
+    inicio = (texto or "")[:4000].lower()
+    if "<urlset" in inicio and "sitemap-news" in inicio:
+        return "news_sitemap"
+    if "<sitemapindex" in inicio:
+        return "sitemap_index"
+    if "<rss" in inicio or "<feed" in inicio or "<rdf:rdf" in inicio:
+        return "feed"
+    return None
+
+
+def _xml(texto: str):
+    # o texto já vem descodificado: a declaração de encoding deixaria o parser confuso
+    try:
+        return ET.fromstring(re.sub(r"^\s*<\?xml[^>]*\?>", "", texto or ""))
+    except ET.ParseError:
+        return None
+
+
+def _filhos_sitemap_index(texto: str) -> List[str]:
+    raiz = _xml(texto)
+    if raiz is None:
+        return []
+    locs = [el.text.strip() for el in raiz.iter(f"{NS_SITEMAP}loc") if el.text]
+    # num index só interessam os sitemaps de notícias
+    return [u for u in locs if "news" in u.lower() and not u.lower().endswith(".gz")]
+
+
+async def descobrir_feeds(session: aiohttp.ClientSession, site_url: str) -> List[str]:
+    """
+    Procura feeds RSS/Atom e sitemaps Google News: <link rel=alternate> da homepage,
+    Sitemap: do robots.txt e caminhos comuns. Devolve só URLs que respondem com um
+    documento válido (no máximo FEED_MAX_FEEDS).
+    """
+    p = urlparse(site_url)
+    raiz = f"{p.scheme or 'https'}://{p.netloc}"
+
+    home, robots = await asyncio.gather(_obter_texto(session, site_url), _obter_texto(session, raiz + "/robots.txt"))
+    candidatos = _links_alternate(home, site_url) if home else []
+    candidatos += [u for u in _sitemaps_robots(robots) if "news" in u.lower()]
+    candidatos += [raiz + c for c in CAMINHOS_COMUNS]
+
+    vistos = set()
+    ordem = [u for u in candidatos if not (u in vistos or vistos.add(u))]
+
+    async def validar(url: str) -> List[str]:
+        texto = await _obter_texto(session, url)
+        tipo = _tipo_documento(texto)
+        if tipo in ("feed", "news_sitemap"):
+            return [url]
+        if tipo == "sitemap_index":
+            filhos = _filhos_sitemap_index(texto)[:FEED_MAX_SITEMAPS_INDEX]
+            validos = []
+            for filho in filhos:
+                if _tipo_documento(await _obter_texto(session, filho)) == "news_sitemap":
+                    validos.append(filho)
+            return validos
+        return []
+
+    resultados = await asyncio.gather(*(validar(u) for u in ordem))
+    feeds = []
+    for lista in resultados:  # mantém a prioridade: alternate > robots > caminhos comuns
+        for url in lista:
+            if url not in feeds:
+                feeds.append(url)
+    return feeds[:FEED_MAX_FEEDS]
+
+
+# ========= LEITURA E MATCH =========
+def _limpar(texto: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", texto or "")).strip()
+
+
+def _itens_news_sitemap(texto: str) -> List[Dict[str, Any]]:
+    raiz = _xml(texto)
+    if raiz is None:
+        return []
+    itens = []
+    for url_el in raiz.iter(f"{NS_SITEMAP}url"):
+        loc = url_el.findtext(f"{NS_SITEMAP}loc") or ""
+        news = url_el.find(f"{NS_NEWS}news")
+        if not loc or news is None:
+            continue
+        itens.append({
+            "titulo": _limpar(news.findtext(f"{NS_NEWS}title")),
+            "url": loc.strip(),
+            "resumo": _limpar(news.findtext(f"{NS_NEWS}keywords")),
+            "data": (news.findtext(f"{NS_NEWS}publication_date") or "").strip(),
+        })
+    return itens
+
+
+def _itens_feed(texto: str) -> List[Dict[str, Any]]:
+    parsed = feedparser.parse(texto)
+    itens = []
+    for e in parsed.entries:
+        link = e.get("link")
+        if not link:
+            continue
+        itens.append({
+            "titulo": _limpar(e.get("title")),
+            "url": link,
+            "resumo": _limpar(e.get("summary") or e.get("description")),
+            "data": e.get("published") or e.get("updated") or "",
+        })
+    return itens
+
+
+def itens_documento(texto: str) -> List[Dict[str, Any]]:
+    """Itens {titulo, url, resumo, data} de um feed RSS/Atom ou sitemap Google News."""
+    tipo = _tipo_documento(texto)
+    if tipo == "news_sitemap":
+        return _itens_news_sitemap(texto)
+    if tipo == "feed":
+        return _itens_feed(texto)
+    return []
+
+
+async def itens_com_keyword(session: aiohttp.ClientSession, feeds: List[str], keyword: str):
+    """
+    Lê os feeds em paralelo e devolve (itens_lidos, itens com a keyword no título ou
+    resumo), sem duplicados e pela ordem dos feeds.
+    """
+    kw = (keyword or "").lower().strip()
+    textos = await asyncio.gather(*(_obter_texto(session, f) for f in feeds))
+    itens = []
+    for texto in textos:
+        if texto:
+            itens += await asyncio.to_thread(itens_documento, texto)
+
+    vistos = set()
+    matches = []
+    for item in itens:
+        if item["url"] in vistos:
+            continue
+        vistos.add(item["url"])
+        if kw and (kw in item["titulo"].lower() or kw in item["resumo"].lower()):
+            matches.append(item)
+    return len(itens), matches
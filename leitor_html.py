@@ -0,0 +1,241 @@
+import codecs
+import json
+import re
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+TAGS_IGNORADAS = {"script", "style", "noscript", "template", "svg"}
+TAGS_CABECA = {"html", "head", "title", "meta", "link", "base", "script", "style", "noscript", "template"}
+CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+ESPACOS_RE = re.compile(r"\s+")
+TIPOS_ARTIGO = {"newsarticle", "article", "reportagenewsarticle", "analysisnewsarticle",
+                "opinionnewsarticle", "blogposting", "liveblogposting", "webpage"}
+METAS_GUARDADAS = {"og:url", "og:title", "og:site_name", "og:type", "article:published_time",
+                   "article:author", "author", "twitter:title", "date", "pubdate", "publish-date",
+                   "parsely-pub-date", "sailthru.date"}
+MAX_JSONLD_CHARS = 200_000
+
+
+def encoding_da_resposta(content_type: str, primeiro_chunk: bytes, omissao: str = "utf-8") -> str:
+    """Charset do Content-Type; senão o <meta charset> do início do documento; senão `omissao`."""
+    m = re.search(r"charset=([\w\-]+)", content_type or "", re.IGNORECASE)
+    if m:
+        return m.group(1)
+    m = CHARSET_RE.search(primeiro_chunk or b"")
+    if m:
+        return m.group(1).decode("ascii", errors="ignore") or omissao
+    return omissao
+
+
+class LeitorArtigo(HTMLParser):
+    """
+    Tokenizer HTML incremental: recebe o documento aos bocados (feed_bytes), ignora
+    script/style, normaliza o texto (minúsculas, espaços colapsados) e procura a keyword
+    à medida que o texto chega, sem nunca guardar o documento inteiro. `completo` fica
+    True quando já há título e match e o <head> foi lido todo (metadados incluídos),
+    altura em que o download pode parar.
+    """
+
+    def __init__(self, keyword: str, encoding: str = "utf-8", max_chars: int = 80_000):
+        super().__init__(convert_charrefs=True)
+        self.kw = ESPACOS_RE.sub(" ", (keyword or "").lower()).strip()
+        self.max_chars = max_chars
+        self.titulo: Optional[str] = None
+        self.encontrou = False
+        self.cabeca_lida = False
+        self.chars = 0
+        self.bytes = 0
+        self._decoder = codecs.getincrementaldecoder(self._codec(encoding))(errors="ignore")
+        self._ignorar = 0
+        self._no_titulo = False
+        self._titulo_partes = []
+        self._cauda = ""
+        self.metas: Dict[str, str] = {}
+        self.canonical: Optional[str] = None
+        self.jsonld: List[str] = []
+        self._no_jsonld = False
+        self._jsonld_partes = []
+
+    @staticmethod
+    def _codec(encoding: str) -> str:
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            return "utf-8"
+
+    @property
+    def completo(self) -> bool:
+        return self.encontrou and self.titulo is not None and self.cabeca_lida
+
+    def feed_bytes(self, chunk: bytes, final: bool = False):
+        self.bytes += len(chunk)
+        texto = self._decoder.decode(chunk, final=final)
+        if texto:
+            self.feed(texto)
+        if final:
+            self.close()
+
+    # ---- eventos do tokenizer ----
+    def handle_starttag(self, tag, attrs):
+        if tag in ("meta", "link"):
+            self._meta(tag, attrs)
+        if not self._ignorar and tag not in TAGS_CABECA:
+            self.cabeca_lida = True  # <body> ou primeira tag de conteúdo (head sem </head>)
+        if tag in TAGS_IGNORADAS:
+            self._ignorar += 1
+            if tag == "script" and (dict(attrs).get("type") or "").lower() == "application/ld+json":
+                self._no_jsonld = True
+                self._jsonld_partes = []
+        elif tag == "title" and self.titulo is None and not self._ignorar:
+            self._no_titulo = True
+        self._separar()
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.cabeca_lida = True
+        if tag in TAGS_IGNORADAS:
+            self._ignorar = max(0, self._ignorar - 1)
+            if tag == "script" and self._no_jsonld:
+                self._no_jsonld = False
+                bloco = "".join(self._jsonld_partes)
+                if sum(len(b) for b in self.jsonld) + len(bloco) <= MAX_JSONLD_CHARS:
+                    self.jsonld.append(bloco)
+                self._jsonld_partes = []
+        elif tag == "title" and self._no_titulo:
+            self._no_titulo = False
+            titulo = ESPACOS_RE.sub(" ", "".join(self._titulo_partes)).strip()
+            self.titulo = titulo or "Sem título"
+        self._separar()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ("meta", "link"):
+            self._meta(tag, attrs)
+        self._separar()
+
+    def handle_data(self, data):
+        if self._no_jsonld:
+            self._jsonld_partes.append(data)
+            return
+        if self._no_titulo:
+            self._titulo_partes.append(data)  # o título também conta para o match
+        if self._ignorar or self.encontrou or self.chars >= self.max_chars or not self.kw:
+            return
+        texto = ESPACOS_RE.sub(" ", data.lower())
+        if not texto.strip():
+            return
+        texto = texto[:self.max_chars - self.chars]
+        self.chars += len(texto)
+        # a janela inclui o fim do bloco anterior para apanhar matches entre nós de texto
+        janela = ESPACOS_RE.sub(" ", self._cauda + texto)
+        if self.kw in janela:
+            self.encontrou = True
+            return
+        self._cauda = janela[-len(self.kw):]
+
+    def _meta(self, tag, attrs):
+        a = {k.lower(): (v or "") for k, v in attrs if k}
+        if tag == "link":
+            if self.canonical is None and "canonical" in a.get("rel", "").lower().split() and a.get("href"):
+                self.canonical = a["href"].strip()
+            return
+        nome = (a.get("property") or a.get("name") or a.get("itemprop") or "").lower().strip()
+        if nome == "datepublished":
+            nome = "article:published_time"
+        if nome in METAS_GUARDADAS and a.get("content") and nome not in self.metas:
+            self.metas[nome] = a["content"].strip()
+
+    def metadados(self) -> Dict[str, Any]:
+        """URL canónica, manchete, publicador, autor e data de publicação (ISO 8601 UTC)."""
+        return extrair_metadados(self.jsonld, self.metas, self.canonical)
+
+    def _separar(self):
+        # cada tag conta como um espaço, como no texto extraído antes por regex
+        if self._cauda and not self._cauda.endswith(" "):
+            self._cauda += " "
+
+
+# ========= METADADOS (JSON-LD / OpenGraph) =========
+def _nomes(valor) -> Optional[str]:
+    """Nome(s) de um campo author/publisher do JSON-LD (string, objeto ou lista)."""
+    if not valor:
+        return None
+    if isinstance(valor, str):
+        return valor.strip() or None
+    if isinstance(valor, dict):
+        return _nomes(valor.get("name"))
+    if isinstance(valor, list):
+        nomes = [n for n in (_nomes(v) for v in valor) if n]
+        return ", ".join(dict.fromkeys(nomes)) or None
+    return None
+
+
+def _objetos_jsonld(blocos: List[str]) -> List[dict]:
+    objetos = []
+    for bloco in blocos:
+        try:
+            dados = json.loads(bloco.strip())
+        except Exception:
+            continue
+        pilha = dados if isinstance(dados, list) else [dados]
+        while pilha:
+            obj = pilha.pop(0)
+            if isinstance(obj, list):
+                pilha.extend(obj)
+            elif isinstance(obj, dict):
+                if "@graph" in obj:
+                    pilha.extend(obj["@graph"] if isinstance(obj["@graph"], list) else [obj["@graph"]])
+                objetos.append(obj)
+    return objetos
+
+
+def _tipos(obj: dict) -> set:
+    t = obj.get("@type")
+    return {str(x).lower() for x in (t if isinstance(t, list) else [t]) if x}
+
+
+def normalizar_data(valor: Optional[str]) -> Optional[str]:
+    """ISO 8601 (com ou sem fuso) -> 'YYYY-MM-DDTHH:MM:SSZ' em UTC; sem fuso fica como está."""
+    if not valor:
+        return None
+    v = valor.strip()
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", v):
+        return v
+    v = re.sub(r"Z$", "+00:00", v)
+    v = re.sub(r"([+-]\d{2})(\d{2})$", r"\1:\2", v)   # +0100 -> +01:00
+    # o fromisoformat do 3.10 só aceita frações de 3 ou 6 dígitos: corta/completa para 6
+    v = re.sub(r"\.(\d+)", lambda m: "." + m.group(1)[:6].ljust(6, "0"), v, count=1)
+    try:
+        dt = datetime.fromisoformat(v.replace(" ", "T", 1))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def extrair_metadados(jsonld: List[str], metas: Dict[str, str], canonical: Optional[str]) -> Dict[str, Any]:
+    artigo = {}
+    for obj in _objetos_jsonld(jsonld):
+        tipos = _tipos(obj)
+        if tipos & TIPOS_ARTIGO and (obj.get("headline") or obj.get("datePublished")):
+            artigo = obj
+            if tipos - {"webpage"}:
+                break  # um *Article ganha a um WebPage
+
+    url_canonica = canonical or metas.get("og:url")
+    if not url_canonica:
+        principal = artigo.get("mainEntityOfPage")
+        url_canonica = principal.get("@id") if isinstance(principal, dict) else principal if isinstance(principal, str) else artigo.get("url")
+
+    publicado = (
+        artigo.get("datePublished") or metas.get("article:published_time") or metas.get("parsely-pub-date")
+        or metas.get("pubdate") or metas.get("publish-date") or metas.get("sailthru.date") or metas.get("date")
+    )
+    return {
+        "url_canonica": url_canonica if isinstance(url_canonica, str) else None,
+        "manchete": _nomes(artigo.get("headline")) or metas.get("og:title") or metas.get("twitter:title"),
+        "publicador": _nomes(artigo.get("publisher")) or metas.get("og:site_name"),
+        "autor": _nomes(artigo.get("author")) or metas.get("article:author") or metas.get("author"),
+        "publicado_em": normalizar_data(publicado if isinstance(publicado, str) else None),
+    }
@@ -7,6 +7,8 @@ from urllib.parse import urlparse, urljoin
 import requests
 from bs4 import BeautifulSoup
 
+from cache_http import obter_cache
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO),
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -103,10 +105,24 @@ def search_media(
 def _fetch_html(url: str, timeout: float, ua: str) -> Optional[str]:
     if not url:
         return None
+    cache = obter_cache()
+    entrada = cache.obter(url) if cache else None
+    if entrada is not None and entrada.fresca and entrada.completo:
+        cache.hit()
+        return entrada.texto()
     headers = {"User-Agent": ua or DEFAULT_UA}
+    if entrada is not None:
+        headers.update(entrada.cabecalhos_condicionais())
     try:
         resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        if resp.status_code == 304 and entrada is not None:
+            cache.renovar(url)
+            cache.hit(revalidado=True)
+            return entrada.texto()
         if 200 <= resp.status_code < 300 and resp.text:
+            if cache and resp.status_code == 200:
+                cache.guardar(url, resp.content, resp.headers.get("Content-Type", ""),
+                              resp.headers.get("ETag"), resp.headers.get("Last-Modified"), completo=True)
             return resp.text
     except Exception:
         return None
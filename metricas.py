@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+SCRAPER_METRICS_PATH = os.getenv("SCRAPER_METRICS_PATH", "scraper_metrics.jsonl").strip()  # vazio = não grava JSONL
+
+logger = logging.getLogger("scraper")
+
+
+class MedicaoFases:
+    """
+    Registo estruturado de uma run: duração (ms) de cada fase, cada artigo visitado
+    e contadores. fechar() grava uma linha JSONL em SCRAPER_METRICS_PATH e um resumo no log.
+    """
+
+    def __init__(self, modo: str, site: str, keyword: str):
+        self._t0 = time.perf_counter()
+        self._abertas = {}
+        self.registo = {
+            "ts": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            "modo": modo,
+            "site": site,
+            "keyword": keyword,
+            "fases_ms": {},
+            "artigos": [],
+            "contagens": {},
+        }
+        self._fechada = False
+
+    def inicio(self, fase: str):
+        self._abertas[fase] = time.perf_counter()
+
+    def fim(self, fase: str):
+        t = self._abertas.pop(fase, None)
+        if t is None:
+            return
+        ms = (time.perf_counter() - t) * 1000
+        fases = self.registo["fases_ms"]
+        fases[fase] = round(fases.get(fase, 0.0) + ms, 1)
+
+    @contextmanager
+    def fase(self, nome: str):
+        self.inicio(nome)
+        try:
+            yield
+        finally:
+            self.fim(nome)
+
+    def artigo(self, url: str, ms: float, via: str, match: Optional[bool]):
+        self.registo["artigos"].append({"url": url, "ms": round(ms, 1), "via": via, "match": match})
+
+    def contar(self, **contagens):
+        self.registo["contagens"].update(contagens)
+
+    def fechar(self) -> dict:
+        if self._fechada:
+            return self.registo
+        self._fechada = True
+        for fase in list(self._abertas):
+            self.fim(fase)
+        self.registo["total_ms"] = round((time.perf_counter() - self._t0) * 1000, 1)
+
+        if SCRAPER_METRICS_PATH:
+            try:
+                pasta = os.path.dirname(SCRAPER_METRICS_PATH)
+                if pasta:
+                    os.makedirs(pasta, exist_ok=True)
+                with open(SCRAPER_METRICS_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self.registo, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.warning(f"[METRICS] Falha a gravar métricas: {e}")
+
+        artigos = self.registo["artigos"]
+        fases = " ".join(f"{k}={v:.0f}" for k, v in self.registo["fases_ms"].items())
+        max_artigo = max((a["ms"] for a in artigos), default=0)
+        logger.info(
+            f"[METRICS] {self.registo['modo']} site={self.registo['site']} kw='{self.registo['keyword']}' "
+            f"total={self.registo['total_ms']:.0f}ms | {fases} | artigos={len(artigos)} (max {max_artigo:.0f}ms) | "
+            f"{self.registo['contagens']}"
+        )
+        return self.registo
@@ -0,0 +1,148 @@
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, quote, quote_plus, unquote, urlencode, urlparse, urlunparse
+
+from database import fechar_ligacao, get_connection
+
+logger = logging.getLogger("scraper")
+
+KEYWORD_PLACEHOLDER = "{keyword}"
+# no path, a keyword com as palavras separadas por hífen/mais em vez de espaço codificado
+SEPARADORES_PATH = {"{keyword-}": "-", "{keyword+}": "+"}
+
+
+def chave_dominio(url: str) -> str:
+    """Chave usada na tabela receitas_pesquisa: host em minúsculas sem 'www.'."""
+    host = (urlparse(url).netloc or url).lower().split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def derivar_url_template(url_resultados: str, keyword: str) -> Optional[str]:
+    """
+    A partir do URL da página de resultados, devolve um template com {keyword}
+    no sítio onde a pesquisa aparece (parâmetro da query ou segmento do path).
+    """
+    kw = (keyword or "").strip().lower()
+    if not kw or not url_resultados:
+        return None
+    p = urlparse(url_resultados)
+
+    params = parse_qsl(p.query, keep_blank_values=True)
+    encontrou = False
+    novos = []
+    for k, v in params:
+        if not encontrou and v.strip().lower() == kw:
+            novos.append((k, KEYWORD_PLACEHOLDER))
+            encontrou = True
+        else:
+            novos.append((k, v))
+    if encontrou:
+        query = urlencode(novos, safe="{}")
+        return urlunparse((p.scheme, p.netloc, p.path, p.params, query, ""))
+
+    segmentos = p.path.split("/")
+    for i, seg in enumerate(segmentos):
+        if not seg:
+            continue
+        valor = unquote(seg).strip().lower()
+        if valor == kw:
+            segmentos[i] = KEYWORD_PLACEHOLDER
+        else:
+            marcador = next((m for m, sep in SEPARADORES_PATH.items()
+                             if " " in kw and valor == kw.replace(" ", sep)), None)
+            if marcador is None:
+                continue
+            segmentos[i] = marcador
+        return urlunparse((p.scheme, p.netloc, "/".join(segmentos), p.params, p.query, ""))
+    return None
+
+
+def montar_url_pesquisa(url_template: str, keyword: str) -> str:
+    """
+    Substitui {keyword} no template (quote_plus na query, quote no path); {keyword-} e
+    {keyword+} no path usam esse separador entre as palavras, como o site usava.
+    """
+    base, sep, query = url_template.partition("?")
+    if KEYWORD_PLACEHOLDER in query:
+        return base + sep + query.replace(KEYWORD_PLACEHOLDER, quote_plus(keyword))
+    for marcador, separador in SEPARADORES_PATH.items():
+        if marcador in url_template:
+            palavras = [quote(w) for w in keyword.split()]
+            return url_template.replace(marcador, separador.join(palavras))
+    return url_template.replace(KEYWORD_PLACEHOLDER, quote(keyword))
+
+
+def obter_receita(dominio: str) -> Optional[Dict[str, Any]]:
+    """Devolve a receita guardada para o domínio (ou None). Nunca lança: a cache é opcional."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT estrategia, seletor_abrir, seletor_input, url_template, ultimo_sucesso, sucessos "
+            "FROM receitas_pesquisa WHERE dominio = %s LIMIT 1",
+            (dominio,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "estrategia": row[0],
+            "seletor_abrir": row[1],
+            "seletor_input": row[2],
+            "url_template": row[3],
+            "ultimo_sucesso": row[4],
+            "sucessos": row[5],
+        }
+    except Exception as e:
+        logger.warning(f"[RECEITA] Falha a ler receita de {dominio}: {e}")
+        return None
+    finally:
+        fechar_ligacao(conn, cursor)
+
+
+def guardar_receita(dominio: str, estrategia: str, seletor_abrir: Optional[str],
+                    seletor_input: Optional[str], url_template: Optional[str]) -> bool:
+    """Cria/atualiza a receita do domínio e marca o último sucesso."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO receitas_pesquisa (dominio, estrategia, seletor_abrir, seletor_input, url_template, ultimo_sucesso, sucessos)
+            VALUES (%s, %s, %s, %s, %s, NOW(), 1)
+            ON DUPLICATE KEY UPDATE
+                estrategia = VALUES(estrategia),
+                seletor_abrir = VALUES(seletor_abrir),
+                seletor_input = VALUES(seletor_input),
+                url_template = COALESCE(VALUES(url_template), url_template),
+                ultimo_sucesso = NOW(),
+                sucessos = sucessos + 1
+        """, (dominio, estrategia, seletor_abrir, seletor_input, url_template))
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"[RECEITA] Falha a guardar receita de {dominio}: {e}")
+        return False
+    finally:
+        fechar_ligacao(conn, cursor)
+
+
+def invalidar_url_template(dominio: str) -> bool:
+    """Esquece o url_template do domínio (ex.: passou a dar erro); os seletores ficam."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE receitas_pesquisa SET url_template = NULL WHERE dominio = %s", (dominio,))
+        conn.commit()
+        logger.info(f"[RECEITA] url_template de {dominio} invalidado.")
+        return True
+    except Exception as e:
+        logger.warning(f"[RECEITA] Falha a invalidar url_template de {dominio}: {e}")
+        return False
+    finally:
+        fechar_ligacao(conn, cursor)
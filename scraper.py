@@ -2,14 +2,29 @@ import asyncio
 import gc
 import logging
 import os
+import re
 import sys
+import time
 import traceback
-from typing import Optional, Tuple
-from urllib.parse import urlparse, urljoin, urldefrag
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse, urljoin, urldefrag
 
 from dotenv import load_dotenv
-from playwright._impl._errors import Error as PlaywrightError
-from playwright.async_api import async_playwright
+
+from bloqueio_pedidos import obter_motor
+from browser_pool import get_pool, run_pooled
+from consentimento import caminho_estado, carregar_estado, guardar_estado, tem_consentimento
+from esperas import (
+    OrcamentoEspera, esperar_mais_elementos, esperar_oculto, esperar_rede_quieta, esperar_seletor,
+    esperar_url_diferente
+)
+from feeds_site import descobrir_feeds, guardar_feeds, itens_com_keyword, obter_feeds
+from metricas import MedicaoFases
+from receitas_pesquisa import (
+    chave_dominio, derivar_url_template, guardar_receita, invalidar_url_template, montar_url_pesquisa, obter_receita
+)
+from scraper_http import TEXT_MAX_CHARS, analisar_html_artigo, extrair_ancoras_html, nova_sessao, obter_html, obter_pagina
 
 load_dotenv()
 
@@ -26,6 +41,34 @@ BLOCK_ADS = os.getenv("BLOCK_ADS", "1") == "1"
 USE_MOBILE = os.getenv("USE_MOBILE", "1") == "1"
 ALLOW_NO_MATCH = os.getenv("ALLOW_NO_MATCH", "1") == "1"      # devolve resultados mesmo sem match exato no conteúdo
 SHOW_LINK_REASONS = os.getenv("SHOW_LINK_REASONS", "0") == "1"  # logs dos motivos de exclusão de links
+MAX_CONCURRENT_VISITS = int(os.getenv("MAX_CONCURRENT_VISITS", "4"))  # separadores de artigos abertos em paralelo
+BROWSERLESS_SEARCH = os.getenv("BROWSERLESS_SEARCH", "1") == "1"   # usa o url_template aprendido por HTTP antes do Chromium
+FEED_DISCOVERY = os.getenv("FEED_DISCOVERY", "1") == "1"             # procura a keyword nos feeds RSS/Atom/news sitemap do site
+FEED_FALLBACK_NO_MATCH = os.getenv("FEED_FALLBACK_NO_MATCH", "0") == "1"  # site com feeds mas sem match -> pesquisa na UI
+
+CONTEXT_KWARGS = dict(
+    java_script_enabled=True,
+    accept_downloads=False,
+    ignore_https_errors=True,
+    viewport={"width": 360, "height": 640} if USE_MOBILE else {"width": 1280, "height": 800},
+    device_scale_factor=1,
+    user_agent=(
+        "Mozilla/5.0 (Linux; Android 12; Pixel 5) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Mobile Safari/537.36"
+    ) if USE_MOBILE else (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Safari/537.36"
+    )
+)
+
+
+def contexto_kwargs(storage_state: Optional[str] = None) -> dict:
+    """CONTEXT_KWARGS com o storage_state (consentimento) do domínio, se houver."""
+    kwargs = dict(CONTEXT_KWARGS)
+    if storage_state:
+        kwargs["storage_state"] = storage_state
+    return kwargs
+
 
 # ========= LOGGING =========
 logging.basicConfig(
@@ -106,13 +149,31 @@ def host_allowed(candidate_host: str, base_host: str) -> bool:
     return False
 
 
+# Uma regex por lista (um scan cada): juntas, um match de notícia escondia um bloqueio sobreposto
+BLOQUEIO_RE = re.compile("|".join(re.escape(h) for h in BLOCKED_URL_HINTS))
+NOTICIA_RE = re.compile("|".join(re.escape(h) for h in NEWS_PATH_HINTS))
+# /2024/05/17/, /2024-05-17-, /20240517
+DATA_PATH_RE = re.compile(r"(?:^|[/_-])(?:19|20)\d{2}(?:[/_-]?(?:0[1-9]|1[0-2])(?:[/_-]?(?:0[1-9]|[12]\d|3[01]))?)?(?=[/_.-]|$)")
+# ids numéricos (>=5 dígitos) como segmento, sufixo de slug ou query (?id=123456)
+ID_ARTIGO_RE = re.compile(r"(?:[/_-]|[?&](?:id|a|n|p)=)\d{5,}(?=[/_.?&-]|$)")
+# slug com pelo menos 4 palavras (título no URL)
+SLUG_RE = re.compile(r"/[a-z0-9à-ÿ]+(?:-[a-z0-9à-ÿ]+){3,}(?:\.s?html?)?/?(?:$|\?)")
+
+
+def _pistas(s: str) -> Tuple[bool, bool]:
+    """(tem pista de bloqueio, tem pista de notícia), com a semântica de substring de any(h in s)."""
+    return BLOQUEIO_RE.search(s) is not None, NOTICIA_RE.search(s) is not None
+
+
 def link_filter_reason(base_host: str, url: str, text: str) -> Tuple[bool, str]:
     u = url.lower()
     t = (text or "").lower().strip()
 
-    if any(b in u for b in BLOCKED_URL_HINTS):
+    bloq_u, noticia_u = _pistas(u)
+    if bloq_u:
         return False, "blocked_by_url_hint"
-    if any(b in t for b in BLOCKED_URL_HINTS):
+    bloq_t, noticia_t = _pistas(t)
+    if bloq_t:
         return False, "blocked_by_text_hint"
 
     if len(t) < 12:
@@ -123,14 +184,107 @@ def link_filter_reason(base_host: str, url: str, text: str) -> Tuple[bool, str]:
         return False, "other_domain"
 
     # Se tiver pista de notícia, ótimo
-    if any(h in u for h in NEWS_PATH_HINTS) or any(h in t for h in NEWS_PATH_HINTS):
+    if noticia_u or noticia_t:
         return True, "news_hint"
 
     # Caso não tenha pistas, ainda aceitamos
     return True, "generic_ok"
 
 
-async def clicar_carregar_mais(page, max_clicks: int = 2):
+def _termos_keyword(keyword: str):
+    return [w for w in re.split(r"\W+", (keyword or "").lower()) if len(w) > 2]
+
+
+def keyword_no_link(url: str, text: str, keyword: str) -> bool:
+    """True se a keyword (ou uma das suas palavras) aparece no texto da âncora ou no URL."""
+    t = (text or "").lower()
+    kw = (keyword or "").lower().strip()
+    if kw and kw in t:
+        return True
+    u = unquote(url.lower())
+    return any(w in t or w in u for w in _termos_keyword(keyword))
+
+
+def pontuar_link(url: str, text: str, keyword: str = "") -> float:
+    """
+    Relevância de um candidato: pistas de notícia, data e id de artigo no path,
+    slug de título e keyword no texto da âncora. Secções curtas (/economia) perdem pontos.
+    """
+    p = urlparse(url.lower())
+    path = p.path + ("?" + p.query if p.query else "")
+    t = (text or "").lower()
+    score = 0.0
+
+    if NOTICIA_RE.search(path):
+        score += 1.0
+    if DATA_PATH_RE.search(p.path):
+        score += 3.0
+    if ID_ARTIGO_RE.search(path):
+        score += 2.0
+    if SLUG_RE.search(path):
+        score += 2.0
+
+    segmentos = [s for s in p.path.split("/") if s]
+    if len(segmentos) <= 1 and not any(ch.isdigit() for ch in p.path) and "-" not in p.path:
+        score -= 3.0  # página de secção/menu
+
+    termos = _termos_keyword(keyword)
+    if termos:
+        kw = (keyword or "").lower().strip()
+        if kw and kw in t:
+            score += 4.0
+        else:
+            score += 3.0 * sum(1 for w in termos if w in t) / len(termos)
+        if any(w in path for w in termos):
+            score += 1.0
+
+    # desempate: títulos reais têm algumas palavras, labels de menu não
+    score += min(len(t.split()), 12) / 12.0
+    return round(score, 2)
+
+
+def selecionar_candidatos(base_url: str, base_host: str, anchors, keyword: str = ""):
+    """
+    Filtra as âncoras [href, texto, y] e devolve (candidatos, reason_counts),
+    com os candidatos (url, texto) já ordenados por pontuar_link.
+    """
+    reason_counts = {
+        "blocked_by_url_hint": 0,
+        "blocked_by_text_hint": 0,
+        "text_too_short": 0,
+        "other_domain": 0,
+        "news_hint": 0,
+        "generic_ok": 0
+    }
+    vistos = set()
+    candidates = []
+    for href, text, y in anchors:
+        if len(candidates) >= MAX_CANDIDATES:
+            break
+        full_url = normalize_url(base_url, href)
+        if not full_url:
+            continue
+        # y só serve para afastar header fixo (None = sem caixa visível)
+        if y is not None and y <= 120:
+            continue
+
+        ok, reason = link_filter_reason(base_host, full_url, text)
+        if ok:
+            if full_url not in vistos:
+                texto = text.strip()
+                candidates.append((pontuar_link(full_url, texto, keyword), full_url, texto))
+                vistos.add(full_url)
+        reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+    # ordenação estável: em empate mantém-se a ordem da página
+    candidates.sort(key=lambda c: -c[0])
+    if SHOW_LINK_REASONS:
+        for score, url, _ in candidates[:MAX_TOP_LINKS]:
+            logger.info(f"[RANK] {score:5.2f} {url}")
+    return [(url, texto) for _, url, texto in candidates], reason_counts
+
+
+async def clicar_carregar_mais(page, max_clicks: int = 2, orcamento: Optional[OrcamentoEspera] = None):
     textos = ["Mais notícias", "Ver mais", "Mostrar mais", "Carregar mais", "Mais artigos"]
     clicks = 0
     for _ in range(max_clicks):
@@ -143,8 +297,10 @@ async def clicar_carregar_mais(page, max_clicks: int = 2):
                         await btn.scroll_into_view_if_needed()
                     except Exception:
                         pass
+                    n_antes = await page.evaluate("() => document.querySelectorAll('a').length")
                     await btn.click(timeout=1500)
-                    await page.wait_for_timeout(800)
+                    # em vez de 800 ms fixos: espera que a lista ganhe âncoras novas (800 ms é só o teto)
+                    await esperar_mais_elementos(page, "a", n_antes, 800, orcamento)
                     clicks += 1
                     clicked = True
                     logger.info(f"Clique em botão de expandir: {tx}")
@@ -156,8 +312,8 @@ async def clicar_carregar_mais(page, max_clicks: int = 2):
     logger.info(f"Expandir listas concluído. Cliques: {clicks}")
 
 
-async def aceitar_cookies(page):
-    await page.wait_for_timeout(800)
+async def aceitar_cookies(page, orcamento: Optional[OrcamentoEspera] = None) -> bool:
+    """Tenta fechar o popup de consentimento. Devolve True se clicou num botão."""
     cookie_selectors = [
         'button[aria-label*="aceitar" i]',
         'button:has-text("Aceitar")',
@@ -172,6 +328,8 @@ async def aceitar_cookies(page):
         'button[title="Aceitar todos"]',
         'button[mode="primary"]',
     ]
+    # espera que algum botão de consentimento apareça (800 ms é só o teto; iframes vêm depois)
+    await esperar_seletor(page, ", ".join(cookie_selectors), 800, orcamento)
     for selector in cookie_selectors:
         try:
             btn = await page.query_selector(selector)
@@ -188,7 +346,8 @@ async def aceitar_cookies(page):
                     except Exception:
                         continue
                 logger.info(f"Cookies aceites via seletor: {selector}")
-                return
+                await esperar_oculto(btn, 300, orcamento)
+                return True
         except Exception:
             continue
     # iframes
@@ -200,15 +359,65 @@ async def aceitar_cookies(page):
                     if btn:
                         await btn.click(timeout=800)
                         logger.info(f"Cookies aceites num iframe: {selector}")
-                        return
+                        await esperar_oculto(btn, 300, orcamento)
+                        return True
                 except Exception:
                     continue
     except Exception:
         pass
     logger.info("Nenhum popup de cookies encontrado/necessário.")
+    return False
+
+
+SELETOR_ESTAVEL_JS = """
+(el) => {
+  const tag = el.tagName.toLowerCase();
+  if (el.id) return tag + '#' + CSS.escape(el.id);
+  const name = el.getAttribute('name');
+  if (name) return tag + '[name="' + name.replace(/"/g, '\\"') + '"]';
+  const aria = el.getAttribute('aria-label');
+  if (aria) return tag + '[aria-label="' + aria.replace(/"/g, '\\"') + '"]';
+  return null;
+}
+"""
+
+
+FORM_TEMPLATE_JS = """
+(el) => {
+  const f = el.form;
+  if (!f || !el.name) return null;
+  if ((f.getAttribute('method') || 'get').toLowerCase() !== 'get') return null;
+  const url = new URL(f.getAttribute('action') || location.href, location.href);
+  for (const h of f.querySelectorAll('input[type="hidden"][name]')) url.searchParams.set(h.name, h.value);
+  url.searchParams.set(el.name, '__KW__');
+  url.hash = '';
+  return url.toString().replace('__KW__', '{keyword}');
+}
+"""
+
+
+async def template_do_formulario(el) -> Optional[str]:
+    """Template de URL de pesquisa a partir do form GET que contém o input (ou None)."""
+    try:
+        return await el.evaluate(FORM_TEMPLATE_JS)
+    except Exception:
+        return None
 
 
-async def encontrar_e_preencher_pesquisa(page, keyword):
+async def seletor_estavel(el) -> Optional[str]:
+    """Seletor reutilizável (id/name/aria-label) para guardar numa receita."""
+    try:
+        return await el.evaluate(SELETOR_ESTAVEL_JS)
+    except Exception:
+        return None
+
+
+async def encontrar_e_preencher_pesquisa(page, keyword, orcamento: Optional[OrcamentoEspera] = None):
+    """
+    Descobre e submete a pesquisa do site. Devolve a receita que funcionou
+    ({"estrategia", "seletor_abrir", "seletor_input", "url_template"}) ou None.
+    O url_template vem do action do form quando este é submetido por GET.
+    """
     logger.info("A procurar campo de pesquisa...")
     input_seletor = (
         'input[type="search"], input[type="text"], '
@@ -232,24 +441,29 @@ async def encontrar_e_preencher_pesquisa(page, keyword):
                         await input_el.click(timeout=500)
                     except Exception:
                         pass
-                    await page.wait_for_timeout(150)
+                    # sem pausa fixa: o fill() já espera que o input fique editável
                     try:
+                        seletor = await seletor_estavel(input_el)
+                        template = await template_do_formulario(input_el)
                         await input_el.fill(keyword, timeout=800)
                         await page.keyboard.press("Enter")
                         logger.info(f"Pesquisa submetida via input índice {idx}")
-                        return True
+                        return seletor, template
                     except Exception as e:
                         logger.debug(f"Falha a preencher input índice {idx}: {e}")
                         continue
         except Exception as e:
             logger.warning(f"Erro ao procurar campo: {e}")
-            return False
-        return False
+            return None
+        return None
 
-    if await tentar_preencher_campo():
-        return True
+    preenchido = await tentar_preencher_campo()
+    if preenchido is not None:
+        return {"estrategia": "input", "seletor_abrir": None,
+                "seletor_input": preenchido[0], "url_template": preenchido[1]}
 
     # Ícones/botões
+    seletor_abrir = None
     botoes = await page.query_selector_all('button, a')
     logger.info(f"Botões/links para tentar abrir pesquisa: {len(botoes)}")
     for botao in botoes:
@@ -261,17 +475,21 @@ async def encontrar_e_preencher_pesquisa(page, keyword):
         if any(term in (html + texto) for term in ["search", "pesquisar", "procura", "lupa", "🔍"]):
             try:
                 await botao.scroll_into_view_if_needed()
+                seletor_abrir = await seletor_estavel(botao)
                 await botao.click(timeout=600)
             except Exception:
                 continue
-            await page.wait_for_timeout(700)
+            await esperar_seletor(page, input_seletor, 700, orcamento)
             break
 
-    if await tentar_preencher_campo():
-        return True
+    preenchido = await tentar_preencher_campo()
+    if preenchido is not None:
+        return {"estrategia": "botao+input", "seletor_abrir": seletor_abrir,
+                "seletor_input": preenchido[0], "url_template": preenchido[1]}
 
     # Fallback JS
     try:
+        url_antes = page.url
         ok = await page.evaluate(f'''
             () => {{
                 const kw = {keyword!r};
@@ -290,320 +508,570 @@ async def encontrar_e_preencher_pesquisa(page, keyword):
                 return false;
             }}
         ''')
-        await page.wait_for_timeout(600)
+        if ok:
+            await esperar_url_diferente(page, url_antes, 600, orcamento)
         logger.info(f"Pesquisa via JS fallback: {ok}")
-        return bool(ok)
+        return {"estrategia": "js", "seletor_abrir": None, "seletor_input": None} if ok else None
     except Exception as e:
         logger.warning(f"Fallback JS falhou: {e}")
+        return None
+
+
+async def aplicar_receita(page, receita, keyword) -> bool:
+    """Tenta submeter a pesquisa com os seletores guardados na receita do domínio."""
+    seletor_input = receita.get("seletor_input")
+    if not seletor_input:
+        return False
+    try:
+        if receita.get("seletor_abrir"):
+            await page.click(receita["seletor_abrir"], timeout=1500)
+        await page.fill(seletor_input, keyword, timeout=1500)
+        await page.press(seletor_input, "Enter")
+        logger.info(f"[RECEITA] Pesquisa submetida via receita ({seletor_input})")
+        return True
+    except Exception as e:
+        logger.info(f"[RECEITA] Receita falhou ({e}); a usar descoberta.")
         return False
 
 
-async def heuristica_seletor(page) -> Optional[str]:
-    seletores = [
-        'article',
-        'div[class*="content"]',
-        'div[class*="article"]',
-        'div[id*="content"]',
-        'section[class*="content"]',
-        'main'
-    ]
-    for sel in seletores:
-        try:
-            elementos = await page.query_selector_all(sel)
-            if elementos and len(elementos) > 0:
-                logger.info(f"Seletor heurístico escolhido: {sel}")
-                return sel
-        except Exception:
-            continue
-    logger.info("Nenhum seletor heurístico encontrado; usar 'body'")
-    return None
-
-
-async def extrair_titulo(page) -> Optional[str]:
-    seletores_titulo = [
-        "h1",
-        "header h1",
-        "article h1",
-        "section h1",
-        "div[class*='title'] h1",
-        "div[class*='header'] h1",
-        "meta[property='og:title']",
-        "title"
-    ]
-    for seletor in seletores_titulo:
-        try:
-            el = await page.query_selector(seletor)
-            if el:
-                if seletor.startswith("meta"):
-                    titulo = await el.get_attribute("content")
-                else:
-                    titulo = await el.inner_text()
-                if titulo and len(titulo.strip()) > 5:
-                    return titulo.strip()
-        except Exception:
-            continue
-    return None
+async def instalar_bloqueio(context, page, url: str = ""):
+    """Bloqueio de anúncios/imagens/media/fontes na página; devolve os contadores da página."""
+    motor = obter_motor(AD_HOST_HINTS, BLOCK_IMAGES, BLOCK_MEDIA, BLOCK_FONTS, BLOCK_ADS)
+    return await motor.instalar(context, page, url)
+
+
+HARVEST_ANCHORS_JS = """
+() => {
+  const out = [];
+  for (const a of document.querySelectorAll('a[href]')) {
+    const r = a.getBoundingClientRect();
+    const y = (r.width === 0 && r.height === 0) ? null : r.top;
+    out.push([a.getAttribute('href'), a.innerText || "", y]);
+  }
+  return out;
+}
+"""
 
 
-def ensure_playwright_browsers_installed():
-    os.environ.setdefault("PLAYWRIGHT_BROWSERS_PATH", "0")
+async def recolher_ancoras(page):
+    """Recolhe [href, texto, y] de todas as âncoras numa única chamada evaluate."""
+    t0 = time.perf_counter()
     try:
-        import subprocess
-        subprocess.run(
-            ["python", "-m", "playwright", "install", "--dry-run"],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-    except Exception:
-        try:
-            subprocess.run(["python", "-m", "playwright", "install", "chromium", "--with-deps"], check=True)
-        except Exception:
-            pass
+        anchors = await page.evaluate(HARVEST_ANCHORS_JS)
+    except Exception as e:
+        logger.warning(f"Falha a recolher âncoras: {e}")
+        anchors = []
+    logger.info(f"Âncoras encontradas na página de resultados: {len(anchors)} (recolha em {(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return anchors
+
+
+ANALISAR_ARTIGO_JS = """
+([kws, maxChars]) => {
+  const CORPO = ['article', 'div[class*="content"]', 'div[class*="article"]',
+                 'div[id*="content"]', 'section[class*="content"]', 'main'];
+  const TITULO = ["h1", "header h1", "article h1", "section h1",
+                  "div[class*='title'] h1", "div[class*='header'] h1"];
+  const meta = (p) => {
+    const m = document.querySelector(`meta[property="${p}"], meta[name="${p}"]`);
+    const v = m ? (m.getAttribute('content') || "").trim() : "";
+    return v || null;
+  };
+
+  let seletor = "body", el = null;
+  for (const s of CORPO) { el = document.querySelector(s); if (el) { seletor = s; break; } }
+  const body = document.body ? (document.body.innerText || "") : "";
+  const corpo = el ? (el.innerText || "") : body;
+
+  let titulo = null;
+  for (const s of TITULO) {
+    const t = document.querySelector(s);
+    const v = t ? (t.innerText || "").trim() : "";
+    if (v.length > 5) { titulo = v; break; }
+  }
+  const ogTitle = meta('og:title');
+  if (!titulo && ogTitle && ogTitle.length > 5) titulo = ogTitle;
+  if (!titulo && (document.title || "").trim().length > 5) titulo = document.title.trim();
+
+  const corpoL = corpo.toLowerCase(), bodyL = body.toLowerCase();
+  const matches = {};
+  for (const kw of kws) {
+    const k = kw.toLowerCase();
+    const sel = corpoL.includes(k);
+    matches[kw] = { sel: sel, body: !sel && bodyL.includes(k) };
+  }
+  return {
+    seletor: seletor,
+    titulo: titulo,
+    texto: corpo.slice(0, maxChars),
+    og: {
+      title: ogTitle, description: meta('og:description'), type: meta('og:type'),
+      url: meta('og:url'), site_name: meta('og:site_name'), published_time: meta('article:published_time')
+    },
+    matches: matches
+  };
+}
+"""
+
+
+async def analisar_artigo_pagina(page, keywords: List[str]) -> Optional[dict]:
+    """
+    Análise do artigo numa única chamada evaluate: seletor do corpo, texto limitado
+    a TEXT_MAX_CHARS, título, metadados og e {keyword: {"sel", "body"}} para todas as keywords.
+    """
+    try:
+        return await page.evaluate(ANALISAR_ARTIGO_JS, [list(keywords), TEXT_MAX_CHARS])
+    except Exception as e:
+        logger.warning(f"Falha na análise do artigo: {e}")
+        return None
 
 
-async def route_intercept(route, request):
-    url = request.url
-    rtype = request.resource_type
+async def visitar_artigo(context, url: str, keyword: str, consentir: bool = False):
+    """
+    Abre um artigo num separador próprio do contexto e devolve (titulo, url, site, has_kw).
+    consentir=True corre o aceitar_cookies (só quando o contexto não trouxe estado de consentimento).
+    """
+    page = await context.new_page()
+    contadores = None
     try:
-        if BLOCK_ADS and any(host in url for host in AD_HOST_HINTS):
-            return await route.abort()
-        if BLOCK_IMAGES and rtype in {"image"}:
-            return await route.abort()
-        if BLOCK_MEDIA and rtype in {"media"}:
-            return await route.abort()
-        if BLOCK_FONTS and rtype in {"font"}:
-            return await route.abort()
-        return await route.continue_()
-    except Exception:
+        contadores = await instalar_bloqueio(context, page, url)
+        await page.goto(url, wait_until='domcontentloaded', timeout=NAV_TIMEOUT)
+        if consentir:
+            await aceitar_cookies(page)
+        current_url = page.url
+        site_name = get_site_name(current_url)
+
+        analise = await analisar_artigo_pagina(page, [keyword]) or {}
+        match = (analise.get("matches") or {}).get(keyword) or {}
+        has_kw_sel = bool(match.get("sel"))
+        has_kw_body = bool(match.get("body"))
+        titulo = analise.get("titulo")
+
+        logger.info(
+            f"[VISIT] {current_url} | sel={analise.get('seletor', 'body')} | match_sel={has_kw_sel} | "
+            f"match_body={has_kw_body} | title={'OK' if titulo else 'N/A'}"
+        )
+        return titulo, current_url, site_name, has_kw_sel or has_kw_body
+    finally:
+        if contadores is not None:
+            logger.info(f"[BLOCK] {url} | {contadores.resumo()}")
         try:
-            await route.continue_()
+            await page.close()
         except Exception:
             pass
 
 
-async def keyword_in_content(page, seletor: str, keyword: str) -> bool:
-    js = """
-    (sel, kw) => {
-      const el = document.querySelector(sel);
-      if (!el) return false;
-      const text = el.innerText || "";
-      return text.toLowerCase().includes(kw.toLowerCase());
-    }
+async def visitar_artigo_isolado(url: str, keyword: str):
+    """Visita um artigo num contexto próprio do pool (para quem não tem um contexto aberto)."""
+    dominio = chave_dominio(url)
+    estado = carregar_estado(dominio)
+    async with get_pool().context(**contexto_kwargs(estado)) as context:
+        context.set_default_navigation_timeout(NAV_TIMEOUT)
+        context.set_default_timeout(ACT_TIMEOUT)
+        visita = await visitar_artigo(context, url, keyword, consentir=estado is None)
+        # sem cookies de consentimento o estado guardado só esconderia o popup durante o TTL
+        if estado is None and await tem_consentimento(context):
+            await guardar_estado(context, dominio)
+        return visita
+
+
+async def verificar_artigo(session, url: str, keyword: str, context=None, medicao: Optional[MedicaoFases] = None):
     """
-    try:
-        return bool(await page.evaluate(js, seletor, keyword))
-    except Exception:
+    Verifica um artigo por HTTP; só abre um separador no browser quando o HTML estático
+    falha ou é uma casca JS. Devolve (titulo, url, site, has_kw).
+    """
+    t0 = time.perf_counter()
+    url_artigo, html = await obter_html(session, url)
+    if html:
+        info = await asyncio.to_thread(analisar_html_artigo, html, keyword)
+        if not info["shell_js"]:
+            logger.info(
+                f"[VISIT-HTTP] {url_artigo} | sel={info['corpo_sel']} | match_sel={info['match_sel']} | "
+                f"match_body={info['match_body']} | title={'OK' if info['titulo'] else 'N/A'}"
+            )
+            has_kw = info["match_sel"] or info["match_body"]
+            if medicao:
+                medicao.artigo(url, (time.perf_counter() - t0) * 1000, "http", has_kw)
+            return info["titulo"], url_artigo, get_site_name(url_artigo), has_kw
+        logger.info(f"[VISIT-HTTP] {url_artigo} parece casca JS; a abrir no browser.")
+    if context is not None:
+        visita = await visitar_artigo(context, url, keyword)
+    else:
+        visita = await run_pooled(visitar_artigo_isolado(url, keyword))
+    if medicao:
+        medicao.artigo(url, (time.perf_counter() - t0) * 1000, "browser", visita[3] if visita else None)
+    return visita
+
+
+async def visitar_artigos(context, session, top_links, keyword: str, max_results: int,
+                          medicao: Optional[MedicaoFases] = None, emitir: Optional[Callable[[dict], None]] = None):
+    """
+    Verifica os top_links em paralelo (até MAX_CONCURRENT_VISITS de cada vez), HTTP primeiro
+    e browser só como recurso. Devolve as visitas bem sucedidas pela ordem de top_links;
+    pára de lançar novas verificações assim que os primeiros da lista já garantem max_results.
+    Com `emitir`, cada resultado confirmado é enviado logo (até max_results).
+    """
+    sem = asyncio.Semaphore(max(1, MAX_CONCURRENT_VISITS))
+    visitas = [None] * len(top_links)
+    feitos = [False] * len(top_links)
+    emitidos = 0
+
+    def resultados_garantidos() -> bool:
+        # só contamos um prefixo contínuo já concluído, para preservar a ordem do ranking
+        n = 0
+        for i in range(len(top_links)):
+            if not feitos[i]:
+                return False
+            v = visitas[i]
+            if v and (v[3] or ALLOW_NO_MATCH):
+                n += 1
+                if n >= max_results:
+                    return True
         return False
 
+    async def worker(i, url):
+        nonlocal emitidos
+        async with sem:
+            if resultados_garantidos():
+                feitos[i] = True
+                return
+            try:
+                visitas[i] = await verificar_artigo(session, url, keyword, context, medicao)
+            except Exception as e:
+                logger.warning(f"Falha a abrir link: {url} | {e}")
+            finally:
+                feitos[i] = True
+        v = visitas[i]
+        if emitir and v and (v[3] or ALLOW_NO_MATCH) and emitidos < max_results:
+            emitidos += 1
+            emitir({"tipo": "resultado", "resultado": (v[0] or "", v[1], v[2]), "match": v[3]})
 
-async def keyword_in_body(page, keyword: str) -> bool:
-    js = """
-    (kw) => {
-      const text = (document.body && document.body.innerText) ? document.body.innerText : "";
-      return text.toLowerCase().includes(kw.toLowerCase());
-    }
+    await asyncio.gather(*(worker(i, url) for i, (url, _txt) in enumerate(top_links)))
+    return [v for v in visitas if v]
+
+
+def montar_resultados(visitas, max_results):
+    """Converte visitas (titulo, url, site, has_kw) em resultados; devolve (resultados, matches)."""
+    resultados = []
+    matches_count = 0
+    for titulo, current_url, site_name, has_kw in visitas:
+        if len(resultados) >= max_results:
+            break
+        if has_kw or ALLOW_NO_MATCH:
+            resultados.append((titulo or "", current_url, site_name))
+            matches_count += 1 if has_kw else 0
+    return resultados, matches_count
+
+
+@asynccontextmanager
+async def contexto_medido(medicao: MedicaoFases, storage_state: Optional[str]):
+    """Contexto do pool com 'browser_launch' (obter browser + contexto) e 'teardown' medidos."""
+    medicao.inicio("browser_launch")
+    async with get_pool().context(**contexto_kwargs(storage_state)) as context:
+        medicao.fim("browser_launch")
+        try:
+            yield context
+        finally:
+            medicao.inicio("teardown")
+    medicao.fim("teardown")
+
+
+async def bot_scraper(site_url, keyword, max_results, emitir: Optional[Callable[[dict], None]] = None):
+    """
+    Pesquisa no site com o Chromium e devolve (site_url, resultados). `emitir(evento)`,
+    se dado, recebe eventos de progresso ("pesquisa_submetida", "candidatos") e cada
+    "resultado" assim que é confirmado.
     """
+    medicao = MedicaoFases("browser", site_url, keyword)
     try:
-        return bool(await page.evaluate(js, keyword))
-    except Exception:
-        return False
+        return await _bot_scraper(site_url, keyword, max_results, medicao, emitir or (lambda _ev: None))
+    finally:
+        medicao.fechar()
 
 
-async def bot_scraper(site_url, keyword, max_results):
+async def _bot_scraper(site_url, keyword, max_results, medicao: MedicaoFases, emitir: Callable[[dict], None]):
     logger.info(f"[START] bot_scraper site={site_url} kw='{keyword}' max={max_results}")
     resultados = []
-    visited_urls = set()
     base_host = urlparse(site_url).netloc
 
-    ensure_playwright_browsers_installed()
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-extensions",
-                    "--disable-gpu",
-                    "--disable-background-networking",
-                    "--disable-background-timer-throttling",
-                    "--disable-renderer-backgrounding",
-                    "--no-default-browser-check",
-                    "--no-first-run",
-                    "--disable-features=Translate",
-                    "--blink-settings=imagesEnabled=false"
-                ]
-            )
-        except PlaywrightError as e:
-            logger.error(f"Falha a lançar o Chromium: {e}")
-            raise
-
-        context_kwargs = dict(
-            java_script_enabled=True,
-            accept_downloads=False,
-            ignore_https_errors=True,
-            viewport={"width": 360, "height": 640} if USE_MOBILE else {"width": 1280, "height": 800},
-            device_scale_factor=1,
-            user_agent=(
-                "Mozilla/5.0 (Linux; Android 12; Pixel 5) AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/114.0.0.0 Mobile Safari/537.36"
-            ) if USE_MOBILE else (
-                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/114.0.0.0 Safari/537.36"
-            )
-        )
-        context = await browser.new_context(**context_kwargs)
+    dominio = chave_dominio(site_url)
+    estado = carregar_estado(dominio)
+    orcamento = OrcamentoEspera()
+    async with contexto_medido(medicao, estado) as context, nova_sessao() as session:
         context.set_default_navigation_timeout(NAV_TIMEOUT)
         context.set_default_timeout(ACT_TIMEOUT)
 
         page = await context.new_page()
-        await page.route("**/*", route_intercept)
+        contadores = await instalar_bloqueio(context, page, site_url)
+
+        async def consentimento():
+            # só percorre o popup quando não há estado válido; depois guarda-o para as próximas runs
+            nonlocal estado
+            if estado is None:
+                with medicao.fase("cookies"):
+                    aceitou = await aceitar_cookies(page, orcamento)
+                    # popup ainda por aparecer (CMP tardio): não gravar, tenta-se outra vez na próxima run
+                    if (aceitou or await tem_consentimento(context)) and await guardar_estado(context, dominio):
+                        estado = caminho_estado(dominio)
+
+        receita = await asyncio.to_thread(obter_receita, dominio)
+        receita_usada = None
+
+        # 1) Receita com URL de resultados: saltar o site base e a descoberta
+        if receita and receita.get("url_template"):
+            url_pesquisa = montar_url_pesquisa(receita["url_template"], keyword)
+            try:
+                with medicao.fase("search_submit"):
+                    resp = await page.goto(url_pesquisa, wait_until='domcontentloaded')
+                if resp is not None and not resp.ok:
+                    # template desatualizado: a página de erro não serve de resultados
+                    logger.info(f"[RECEITA] URL da receita devolveu HTTP {resp.status}; a usar site base.")
+                    await asyncio.to_thread(invalidar_url_template, dominio)
+                    receita = dict(receita, url_template=None)
+                else:
+                    await consentimento()
+                    receita_usada = receita
+                    logger.info(f"[RECEITA] Resultados abertos diretamente: {url_pesquisa}")
+            except Exception as e:
+                logger.info(f"[RECEITA] URL da receita falhou ({e}); a usar site base.")
 
-        try:
-            await page.goto(site_url, wait_until='domcontentloaded')
-            logger.info(f"Navegou para site base: {site_url}")
-        except Exception as e:
-            logger.exception(f"Erro ao abrir site base: {e}")
-            await context.close()
-            await browser.close()
-            return site_url, []
+        if receita_usada is None:
+            try:
+                with medicao.fase("base_nav"):
+                    await page.goto(site_url, wait_until='domcontentloaded')
+                logger.info(f"Navegou para site base: {site_url}")
+            except Exception as e:
+                logger.exception(f"Erro ao abrir site base: {e}")
+                medicao.contar(erro="base_nav")
+                return site_url, []
 
-        await aceitar_cookies(page)
-        await asyncio.sleep(0.3)
+            await consentimento()
 
-        sucesso = await encontrar_e_preencher_pesquisa(page, keyword)
-        if not sucesso:
-            logger.warning("Não conseguiu submeter a pesquisa. Abort.")
-            await context.close()
-            await browser.close()
-            return site_url, []
+            # 2) Receita com seletores; 3) descoberta completa
+            with medicao.fase("search_submit"):
+                if receita and await aplicar_receita(page, receita, keyword):
+                    receita_usada = receita
+                else:
+                    receita_usada = await encontrar_e_preencher_pesquisa(page, keyword, orcamento)
+            if not receita_usada:
+                logger.warning("Não conseguiu submeter a pesquisa. Abort.")
+                medicao.contar(erro="search_submit")
+                return site_url, []
+        medicao.contar(estrategia=receita_usada.get("estrategia"), receita=receita is not None)
+        emitir({"tipo": "pesquisa_submetida", "url": page.url, "estrategia": receita_usada.get("estrategia")})
 
-        try:
-            await page.wait_for_load_state('networkidle', timeout=9000)
-        except Exception:
-            logger.info("Timeout em networkidle (seguimos em frente).")
-
-        await clicar_carregar_mais(page, max_clicks=2)
-
-        anchors = await page.query_selector_all('a')
-        total_anchors = len(anchors)
-        logger.info(f"Âncoras encontradas na página de resultados: {total_anchors}")
-
-        reason_counts = {
-            "blocked_by_url_hint": 0,
-            "blocked_by_text_hint": 0,
-            "text_too_short": 0,
-            "other_domain": 0,
-            "news_hint": 0,
-            "generic_ok": 0
-        }
-
-        candidates = []
-        for a in anchors:
-            if len(candidates) >= MAX_CANDIDATES:
-                break
-            try:
-                href = await a.get_attribute("href")
-                full_url = normalize_url(page.url, href)
-                if not full_url:
-                    continue
-                text = (await a.inner_text()) or ""
-                # Usa bounding_box só para afastar header fixo
-                try:
-                    box = await a.bounding_box()
-                    if box and box.get("y", 1000) <= 120:
-                        continue
-                except Exception:
-                    pass
+        with medicao.fase("networkidle"):
+            if not await esperar_rede_quieta(page, 9000, orcamento):
+                logger.info("Timeout em networkidle (seguimos em frente).")
 
-                ok, reason = link_filter_reason(base_host, full_url, text)
-                if ok:
-                    if full_url not in visited_urls:
-                        candidates.append((full_url, text.strip()))
-                        visited_urls.add(full_url)
-                reason_counts[reason] = reason_counts.get(reason, 0) + 1
-            except Exception:
-                continue
+        with medicao.fase("load_more"):
+            await clicar_carregar_mais(page, max_clicks=2, orcamento=orcamento)
+
+        with medicao.fase("anchor_harvest"):
+            anchors = await recolher_ancoras(page)
+            candidates, reason_counts = selecionar_candidatos(page.url, base_host, anchors, keyword)
 
         logger.info(f"Candidatos recolhidos: {len(candidates)} (limite {MAX_CANDIDATES})")
+        url_resultados = page.url
         if SHOW_LINK_REASONS:
             logger.info(f"Motivos de filtragem: {reason_counts}")
 
-        # ordenar por tamanho do texto (mais contexto) e limitar
-        candidates.sort(key=lambda x: -len(x[1]))
         top_links = candidates[:MAX_TOP_LINKS]
         logger.info(f"Top links a visitar: {len(top_links)}")
+        logger.info(f"[BLOCK] {page.url} | {contadores.resumo()}")
+        emitir({"tipo": "candidatos", "candidatos": len(candidates), "a_visitar": len(top_links)})
+
+        with medicao.fase("articles"):
+            visitas = await visitar_artigos(context, session, top_links, keyword, max_results, medicao, emitir)
+        resultados, matches_count = montar_resultados(visitas, max_results)
+        if matches_count:
+            # só uma pesquisa com artigos confirmados conta como sucesso da receita
+            await asyncio.to_thread(
+                guardar_receita,
+                dominio,
+                receita_usada.get("estrategia") or "input",
+                receita_usada.get("seletor_abrir"),
+                receita_usada.get("seletor_input"),
+                derivar_url_template(url_resultados, keyword) or receita_usada.get("url_template"),
+            )
 
-        visited_count = 0
-        matches_count = 0
-
-        for url, cand_text in top_links:
-            if len(resultados) >= max_results:
-                break
-            try:
-                await page.goto(url, wait_until='domcontentloaded', timeout=NAV_TIMEOUT)
-                await aceitar_cookies(page)
-                await asyncio.sleep(0.2)
-                current_url = page.url
-                site_name = get_site_name(current_url)
-
-                seletor_corpo = await heuristica_seletor(page)
-                corpo_sel = seletor_corpo or "article"
-                # se não existir article, caímos para body
-                if seletor_corpo is None:
-                    corpo_sel = "body"
-
-                has_kw_sel = await keyword_in_content(page, corpo_sel, keyword)
-                has_kw_body = False if has_kw_sel else await keyword_in_body(page, keyword)
-                has_kw = has_kw_sel or has_kw_body
-
-                titulo = await extrair_titulo(page)
+        logger.info(f"[DONE] visitados={len(visitas)} | resultados={len(resultados)} | matches_exatos={matches_count}")
+        medicao.contar(
+            ancoras=len(anchors), candidatos=len(candidates), visitados=len(visitas),
+            resultados=len(resultados), matches=matches_count, motivos=reason_counts,
+            pedidos_bloqueados=contadores.bloqueados, pedidos_permitidos=contadores.permitidos,
+            espera_ms=round(orcamento.gasto_ms),
+        )
 
-                logger.info(
-                    f"[VISIT] {current_url} | sel={corpo_sel} | match_sel={has_kw_sel} | "
-                    f"match_body={has_kw_body} | title={'OK' if titulo else 'N/A'}"
-                )
+    gc.collect()
 
-                if has_kw or ALLOW_NO_MATCH:
-                    resultados.append((titulo or "", current_url, site_name))
-                    matches_count += 1 if has_kw else 0
+    return site_url, resultados
 
-                visited_count += 1
 
-                # voltar à lista
-                try:
-                    await page.go_back(timeout=8000)
-                except Exception:
-                    # Se falhar voltar, tentamos abrir de novo a página de resultados
-                    try:
-                        await page.goto(site_url, wait_until='domcontentloaded', timeout=NAV_TIMEOUT)
-                    except Exception:
-                        pass
-                await asyncio.sleep(0.1)
+async def pesquisa_sem_browser(site_url, keyword, max_results):
+    """
+    Modo sem browser: abre por HTTP o url_template aprendido para o domínio e verifica
+    os artigos também por HTTP (só cascas JS vão a um contexto do pool). Devolve None
+    quando não há template ou quando o HTML estático não tem âncoras úteis (o chamador
+    recorre então ao Chromium).
+    """
+    dominio = chave_dominio(site_url)
+    receita = await asyncio.to_thread(obter_receita, dominio)
+    if not receita or not receita.get("url_template"):
+        return None
 
-            except Exception as e:
-                logger.warning(f"Falha a abrir link: {url} | {e}")
+    url_pesquisa = montar_url_pesquisa(receita["url_template"], keyword)
+    base_host = urlparse(site_url).netloc
+    logger.info(f"[START] pesquisa_sem_browser site={site_url} kw='{keyword}' url={url_pesquisa}")
 
-        logger.info(f"[DONE] visitados={visited_count} | resultados={len(resultados)} | matches_exatos={matches_count}")
+    medicao = MedicaoFases("http", site_url, keyword)
+    try:
+        async with nova_sessao() as session:
+            with medicao.fase("search_submit"):
+                url_final, status, html = await obter_pagina(session, url_pesquisa)
+            if status is not None and 400 <= status < 500:
+                # template morto: sem isto o Chromium abria a seguir o mesmo URL
+                await asyncio.to_thread(invalidar_url_template, dominio)
+            if not html:
+                medicao.contar(erro="search_submit")
+                return None
+            with medicao.fase("anchor_harvest"):
+                anchors = await asyncio.to_thread(extrair_ancoras_html, html)
+                candidates, reason_counts = selecionar_candidatos(url_final, base_host, anchors, keyword)
+            logger.info(f"[HTTP] Âncoras estáticas: {len(anchors)} | candidatos: {len(candidates)}")
+            if SHOW_LINK_REASONS:
+                logger.info(f"Motivos de filtragem: {reason_counts}")
+            if not candidates:
+                logger.info("[HTTP] HTML de resultados sem âncoras úteis; a usar Chromium.")
+                medicao.contar(ancoras=len(anchors), candidatos=0, motivos=reason_counts)
+                return None
+            # resultados renderizados por JS: no HTML estático só sobram rodapé/"mais lidas"
+            if not any(keyword_no_link(url, texto, keyword) for url, texto in candidates):
+                logger.info("[HTTP] Nenhum candidato mostra a keyword (resultados por JS?); a usar Chromium.")
+                medicao.contar(ancoras=len(anchors), candidatos=len(candidates), motivos=reason_counts)
+                return None
+            with medicao.fase("articles"):
+                visitas = await visitar_artigos(None, session, candidates[:MAX_TOP_LINKS], keyword, max_results, medicao)
+
+        resultados, matches_count = montar_resultados(visitas, max_results)
+        if matches_count:
+            await asyncio.to_thread(
+                guardar_receita, dominio, receita.get("estrategia") or "input",
+                receita.get("seletor_abrir"), receita.get("seletor_input"), receita["url_template"]
+            )
+        logger.info(f"[DONE] (HTTP) visitados={len(visitas)} | resultados={len(resultados)} | matches_exatos={matches_count}")
+        medicao.contar(
+            ancoras=len(anchors), candidatos=len(candidates), visitados=len(visitas),
+            resultados=len(resultados), matches=matches_count, motivos=reason_counts,
+        )
+        return resultados
+    finally:
+        medicao.fechar()
 
-        await context.close()
-        await browser.close()
-        gc.collect()
 
-    return site_url, resultados
+async def pesquisa_por_feeds(site_url, keyword, max_results):
+    """
+    Modo feeds: procura a keyword nos títulos/resumos dos feeds RSS/Atom e sitemaps
+    Google News do site, sem abrir artigos. Os feeds de cada domínio ficam em cache
+    (tabela feeds_site). Devolve None quando o site não tem feeds (o chamador segue
+    para a pesquisa na UI).
+    """
+    dominio = chave_dominio(site_url)
+    medicao = MedicaoFases("feeds", site_url, keyword)
+    try:
+        async with nova_sessao() as session:
+            feeds = await asyncio.to_thread(obter_feeds, dominio)
+            if feeds is None:
+                with medicao.fase("feed_discovery"):
+                    feeds = await descobrir_feeds(session, site_url)
+                await asyncio.to_thread(guardar_feeds, dominio, feeds)
+                logger.info(f"[FEEDS] {dominio}: {len(feeds)} feed(s) descoberto(s) {feeds}")
+            if not feeds:
+                medicao.contar(feeds=0)
+                return None
+
+            with medicao.fase("feed_read"):
+                lidos, itens = await itens_com_keyword(session, feeds, keyword)
+
+        resultados = [
+            (item["titulo"], item["url"], get_site_name(item["url"]))
+            for item in itens[:max_results]
+        ]
+        logger.info(f"[DONE] (FEEDS) feeds={len(feeds)} | itens={lidos} | matches={len(itens)} | resultados={len(resultados)}")
+        medicao.contar(feeds=len(feeds), itens=lidos, matches=len(itens), resultados=len(resultados))
+        if not resultados and (lidos == 0 or FEED_FALLBACK_NO_MATCH):
+            return None
+        return resultados
+    finally:
+        medicao.fechar()
 
 
-async def executar_scraper(site_url, keyword, max_results):
+async def executar_scraper(site_url, keyword, max_results, propagar_erros: bool = False):
+    """
+    Feeds, depois HTTP sem browser, depois Chromium. Em erro devolve [] (registado no log);
+    com propagar_erros=True a exceção sobe para o chamador (ex.: o varrimento contar falhas).
+    """
     try:
-        _, resultados = await bot_scraper(site_url, keyword, max_results)
+        if FEED_DISCOVERY:
+            resultados = await pesquisa_por_feeds(site_url, keyword, max_results)
+            if resultados is not None:
+                return resultados
+        if BROWSERLESS_SEARCH:
+            resultados = await pesquisa_sem_browser(site_url, keyword, max_results)
+            if resultados is not None:
+                return resultados
+        _, resultados = await run_pooled(bot_scraper(site_url, keyword, max_results))
         return resultados
     except Exception as e:
+        if propagar_erros:
+            raise
         logger.exception(f"executar_scraper falhou: {e}")
         return []
 
 
+async def executar_scraper_stream(site_url, keyword, max_results) -> AsyncIterator[dict]:
+    """
+    Variante em streaming de executar_scraper: gera eventos {"tipo": ...} à medida que a
+    run avança. Os modos feeds/HTTP entregam os resultados de uma vez; no modo browser cada
+    "resultado" chega assim que é confirmado. Termina sempre com {"tipo": "fim", "resultados": [...]}.
+    """
+    resultados = None
+    try:
+        if FEED_DISCOVERY:
+            resultados = await pesquisa_por_feeds(site_url, keyword, max_results)
+        if resultados is None and BROWSERLESS_SEARCH:
+            resultados = await pesquisa_sem_browser(site_url, keyword, max_results)
+    except Exception as e:
+        logger.exception(f"executar_scraper_stream falhou: {e}")
+        resultados = None
+    if resultados is not None:
+        for r in resultados:
+            yield {"tipo": "resultado", "resultado": r}
+        yield {"tipo": "fim", "resultados": resultados}
+        return
+
+    # Modo browser: o bot corre no loop do pool e os eventos voltam por uma fila deste loop
+    loop = asyncio.get_running_loop()
+    fila: asyncio.Queue = asyncio.Queue()
+    emitir = lambda ev: loop.call_soon_threadsafe(fila.put_nowait, ev)  # noqa: E731
+    tarefa = asyncio.ensure_future(run_pooled(bot_scraper(site_url, keyword, max_results, emitir)))
+    tarefa.add_done_callback(lambda _t: loop.call_soon_threadsafe(fila.put_nowait, None))
+    try:
+        while True:
+            ev = await fila.get()
+            if ev is None:
+                break
+            yield ev
+        try:
+            _, resultados = tarefa.result()
+        except Exception as e:
+            logger.exception(f"executar_scraper_stream falhou: {e}")
+            resultados = []
+        yield {"tipo": "fim", "resultados": resultados}
+    finally:
+        if not tarefa.done():
+            tarefa.cancel()
+
+
 async def rodar_varias_keywords(site_url, keywords, max_results=3):
     resultados_por_keyword = []
     for kw in keywords:
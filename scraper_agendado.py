@@ -1,7 +1,8 @@
 from datetime import datetime
-from scraper_google import executar_scraper_google
+from scraper_google import executar_scraper_google, publicado_dentro_do_filtro
 import time
 from database import get_connection
+from url_canonica import IndiceDedup, hash_url
 
 def get_clientes_keywords():
     conn = get_connection()
@@ -16,9 +17,9 @@ def guardar_noticia(noticia, cliente_id, keyword):
     cursor = conn.cursor()
     try:
         cursor.execute("""
-            INSERT IGNORE INTO noticias_sugeridas (titulo, url, data, keyword, cliente_id, site)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (noticia["titulo"], noticia["link"], noticia["data"], keyword, cliente_id, noticia["site"]))
+            INSERT IGNORE INTO noticias_sugeridas (titulo, url, url_chave, data, keyword, cliente_id, site)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (noticia["titulo"], noticia["link"], hash_url(noticia["link"]), noticia.get("publicado_em") or noticia["data"], keyword, cliente_id, noticia["site"]))
         conn.commit()
     except Exception as e:
         print("Erro a guardar:", e)
@@ -27,6 +28,8 @@ def guardar_noticia(noticia, cliente_id, keyword):
 
 def correr_para_todos():
     clientes = get_clientes_keywords()
+    indice = IndiceDedup()  # artigos visitados nesta run, entre keywords e clientes
+    por_keyword = {}        # keyword repetida noutro cliente reaproveita a pesquisa
     for cliente_id, keywords_str in clientes:
         if not keywords_str:
             continue
@@ -34,11 +37,16 @@ def correr_para_todos():
         for keyword in keywords:
             print(f"[{datetime.now()}] A correr para Cliente {cliente_id} - Keyword: {keyword}")
             try:
-                resultados = executar_scraper_google(keyword, "Últimas 24 horas")
-                for r in resultados:
-                    if r["status"] == "ENCONTRADA":
+                filtro_tempo = "Últimas 24 horas"
+                chave_kw = keyword.lower()
+                novo = chave_kw not in por_keyword
+                if novo:
+                    por_keyword[chave_kw] = executar_scraper_google(keyword, filtro_tempo, indice)
+                for r in por_keyword[chave_kw]:
+                    if r["status"] == "ENCONTRADA" and publicado_dentro_do_filtro(r, filtro_tempo):
                         guardar_noticia(r, cliente_id, keyword)
-                time.sleep(5)
+                if novo:
+                    time.sleep(5)
             except Exception as e:
                 print(f"Erro: {e}")
 
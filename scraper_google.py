@@ -3,10 +3,15 @@ import re
 import gc
 import json
 import time
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-from urllib.parse import urlparse, urlunparse, urljoin, parse_qs, urlencode, quote_plus
+from urllib.parse import urlparse, urlunparse, urljoin, parse_qs, urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys as SeleniumKeys
@@ -15,6 +20,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from cache_http import obter_cache
+from leitor_html import LeitorArtigo, encoding_da_resposta
+from url_canonica import IndiceDedup, chave_canonica, limpar_url
+
 # -------------------------------------------------------------
 # Configurações principais (rápido e leve em memória)
 # -------------------------------------------------------------
@@ -34,6 +43,7 @@ MAX_SECONDS_PER_LINK = int(os.getenv("MAX_SECONDS_PER_LINK", "7") or "7")    # t
 MAX_SECONDS_PER_KEYWORD = int(os.getenv("MAX_SECONDS_PER_KEYWORD", "0") or "0")  # 0 = sem limite total
 MAX_EMPTY_SERP_PAGES = int(os.getenv("MAX_EMPTY_SERP_PAGES", "2") or "2")    # parar após N páginas seguidas sem novos links
 FAST_MODE = int(os.getenv("FAST_MODE", "1") or "1")
+DRIVER_MAX_KEYWORDS = int(os.getenv("DRIVER_MAX_KEYWORDS", "25") or "25")  # reciclar o Chrome após N keywords (0 = nunca)
 DO_NOT_ACCEPT_SITE_COOKIES = int(os.getenv("DO_NOT_ACCEPT_SITE_COOKIES", "1") or "1")  # não usado em HTTP
 RESULTS_JSONL_PATH = os.getenv("RESULTS_JSONL_PATH", "").strip()  # se vazio, acumula em memória
 
@@ -42,6 +52,11 @@ HTTP_CONNECT_TIMEOUT = int(os.getenv("HTTP_CONNECT_TIMEOUT", "4") or "4")
 HTTP_READ_TIMEOUT = int(os.getenv("HTTP_READ_TIMEOUT", str(MAX_SECONDS_PER_LINK)) or str(MAX_SECONDS_PER_LINK))
 HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", str(1_500_000)) or "1500000")  # lê no máx ~1.5MB por página
 TEXT_MAX_CHARS = int(os.getenv("TEXT_MAX_CHARS", str(80_000)) or "80000")
+HTTP_CONCURRENCY = int(os.getenv("HTTP_CONCURRENCY", "8") or "8")   # artigos da SERP pedidos em paralelo
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "2") or "2")         # pedidos em paralelo ao mesmo domínio
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "64") or "64")   # domínios com ligações keep-alive guardadas
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", str(max(4, HTTP_PER_HOST))) or "4")  # ligações guardadas por domínio
+HTTP_DRAIN_MAX_BYTES = int(os.getenv("HTTP_DRAIN_MAX_BYTES", str(256 * 1024)) or "262144")  # resto lido após parar cedo p/ reusar a ligação
 
 def ensure_dirs():
     os.makedirs(SCREENSHOT_DIR, exist_ok=True)
@@ -214,109 +229,145 @@ def aceitar_cookies_google(driver, time_budget_s=3):
 # -------------------------------------------------------------
 # Pesquisa Google (SERP em tbm=nws)
 # -------------------------------------------------------------
-def abrir_pesquisa_google(driver, keyword):
-    url = f"https://www.google.com/search?q={quote_plus(keyword)}&hl=pt-PT&gl=pt&tbm=nws"
-    open_url_with_timeout(driver, url, soft_wait=0.4)
-    aceitar_cookies_google(driver, time_budget_s=(2 if FAST_MODE else 4))
+SERP_HL = os.getenv("SERP_HL", "pt-PT")
+SERP_GL = os.getenv("SERP_GL", "pt")
+
+CONSENT_WALL_JS = """
+if (location.hostname.indexOf('consent.') === 0) return true;
+return !!document.querySelector(
+  "form[action*='consent.google'], iframe[src*='consent.google'], #L2AGLb, div[aria-modal='true'] button[jsname]"
+);
+"""
+
+def codigo_filtro_tempo(filtro_tempo):
+    """'Última hora' -> 'h', 'Últimas 24 horas' -> 'd', ... ; None sem filtro."""
+    t = (filtro_tempo or "").strip().lower()
+    if "hora" in t and "24" not in t: return "h"
+    if "24" in t or "dia" in t: return "d"
+    if "semana" in t: return "w"
+    if "mês" in t or "mes" in t: return "m"
+    if "ano" in t: return "y"
+    return None
+
+def publicado_dentro_do_filtro(result, filtro_tempo, agora=None):
+    """
+    False só quando o artigo tem data de publicação absoluta e ela é mais antiga que
+    a janela do filtro (a SERP às vezes marca como recentes páginas antigas).
+    """
+    code = codigo_filtro_tempo(filtro_tempo)
+    publicado = result.get("publicado_em")
+    if not code or not publicado or not publicado.endswith("Z"):
+        return True
     try:
-        WebDriverWait(driver, 5).until(
-            EC.any_of(
-                EC.url_contains("tbm=nws"),
-                EC.presence_of_element_located((By.XPATH, "//div[@role='heading']")),
-            )
-        )
+        dt = datetime.strptime(publicado, "%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        return True
+    janela_h = {"h": 1, "d": 24, "w": 24 * 7, "m": 24 * 31, "y": 24 * 366}[code]
+    idade_h = ((agora or datetime.utcnow()) - dt).total_seconds() / 3600.0
+    return idade_h <= janela_h + 1  # 1h de folga para relógios/fusos
+
+def montar_url_serp(keyword, filtro_tempo=None, start=0, hl=SERP_HL, gl=SERP_GL):
+    """URL final da SERP de notícias (query, locale, tbm=nws, tbs=qdr:X e start)."""
+    params = [("q", keyword), ("hl", hl), ("gl", gl), ("tbm", "nws")]
+    code = codigo_filtro_tempo(filtro_tempo)
+    if code:
+        params.append(("tbs", f"qdr:{code}"))
+    if start:
+        params.append(("start", str(start)))
+    return "https://www.google.com/search?" + urlencode(params, safe=":")
+
+def consentimento_visivel(driver):
+    try:
+        return bool(driver.execute_script(CONSENT_WALL_JS))
     except Exception:
-        pass
+        return False
 
-def aplicar_filtro_tempo_por_url(driver, filtro_tempo):
-    t = (filtro_tempo or "").strip().lower()
-    code = None
-    if "hora" in t: code = "h"
-    elif "24" in t or "dia" in t: code = "d"
-    elif "semana" in t: code = "w"
-    elif "mês" in t or "mes" in t: code = "m"
-    elif "ano" in t: code = "y"
-    if not code:
-        return
+def abrir_pesquisa_google(driver, keyword, filtro_tempo=None):
+    """
+    Abre a SERP já com filtro de tempo numa só navegação. O consentimento só é
+    tratado quando há mesmo uma parede de consentimento; nesse caso a SERP é
+    reaberta. Devolve True quando aceitou cookies.
+    """
+    url = montar_url_serp(keyword, filtro_tempo)
+    open_url_with_timeout(driver, url, soft_wait=0)
+    aceitou = False
+    if consentimento_visivel(driver):
+        log("[DEBUG] Parede de consentimento detetada.")
+        aceitou = aceitar_cookies_google(driver, time_budget_s=(2 if FAST_MODE else 4))
+        if "/search" not in driver.current_url or consentimento_visivel(driver):
+            open_url_with_timeout(driver, url, soft_wait=0)
     try:
-        p = urlparse(driver.current_url)
-        qs = parse_qs(p.query)
-        qs["tbs"] = [f"qdr:{code}"]
-        newq = urlencode(qs, doseq=True)
-        new_url = urlunparse((p.scheme, p.netloc, p.path, p.params, newq, p.fragment))
-        open_url_with_timeout(driver, new_url, soft_wait=0.3)
-        log(f"[DEBUG] Filtro aplicado por URL: tbs=qdr:{code}")
+        WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='heading'], h3, a.WlydOe, #search"))
+        )
     except Exception:
         pass
+    code = codigo_filtro_tempo(filtro_tempo)
+    if code:
+        log(f"[DEBUG] SERP aberta com tbs=qdr:{code}")
+    return aceitou
 
 # -------------------------------------------------------------
 # Recolha ordenada de links (por posição vertical)
 # -------------------------------------------------------------
+SERP_LINKS_JS = """
+const out = [];
+let anchors = Array.from(document.querySelectorAll('a')).filter(a => a.querySelector("div[role='heading'], h3"));
+if (!anchors.length) anchors = Array.from(document.querySelectorAll('a.WlydOe'));
+for (const a of anchors) {
+  const href = a.href || '';
+  if (!href) continue;
+  const y = a.getBoundingClientRect().top + window.scrollY;
+  // mesmo bloco que o XPath ancestor::*[self::div or self::article][1]
+  let bloco = a.parentElement;
+  while (bloco && !['DIV', 'ARTICLE'].includes(bloco.tagName)) bloco = bloco.parentElement;
+  const datas = [];
+  if (bloco) {
+    for (const sp of bloco.querySelectorAll('span, time')) {
+      const txt = ((sp.getAttribute('aria-label') || sp.innerText || '') + '').trim();
+      if (txt && txt.length <= 60) datas.push(txt);
+    }
+  }
+  out.push([href, y, datas]);
+}
+return out;
+"""
+
+def _data_dos_textos(textos):
+    for txt in textos:
+        if re.match(r"^há\s+\d+\s+(minuto|hora|dia|semana|m[eê]s|ano)s?$", txt, flags=re.IGNORECASE):
+            return txt
+        if re.match(r"^\d{2}/\d{2}/\d{4}$", txt):
+            return txt
+        if re.search(r"\d", txt) and any(w in txt.lower() for w in ("há","min","hora","dia","semana","mês","mes","ano")):
+            return txt
+    return "N/D"
+
 def coletar_links_noticias(driver, excluir_br=False):
+    """Links da SERP ordenados pela posição vertical, com a data de cada bloco, numa só chamada de script."""
     log("[DEBUG] A recolher links das notícias...")
-    raw_items = []
-
-    # Método 1: âncoras com heading dentro
     try:
-        blocos = WebDriverWait(driver, 6).until(
-            EC.presence_of_all_elements_located((By.XPATH, "//a[.//div[@role='heading'] or .//h3]"))
+        WebDriverWait(driver, 6).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='heading'], h3, a.WlydOe"))
         )
-        for a_el in blocos:
-            try:
-                href = a_el.get_attribute("href") or ""
-                if href:
-                    y = a_el.location.get("y", 0)
-                    raw_items.append((a_el, href, y))
-            except Exception:
-                continue
     except Exception:
         pass
 
-    # Método 2: fallback News CSS
-    if not raw_items:
-        try:
-            anchors = driver.find_elements(By.CSS_SELECTOR, "a.WlydOe")
-            for a_el in anchors:
-                try:
-                    href = a_el.get_attribute("href") or ""
-                    if href:
-                        y = a_el.location.get("y", 0)
-                        raw_items.append((a_el, href, y))
-                except Exception:
-                    continue
-        except Exception:
-            pass
+    try:
+        raw_items = driver.execute_script(SERP_LINKS_JS) or []
+    except Exception as e:
+        log(f"[DEBUG] Falha a extrair a SERP: {e}")
+        raw_items = []
 
-    raw_items.sort(key=lambda t: t[2])
+    raw_items.sort(key=lambda t: t[1] or 0)
 
     links = []
-    for a_el, href, _y in raw_items:
-        try:
-            if href.startswith("/"):
-                href = urljoin("https://www.google.com", href)
-            if excluir_br and urlparse(href).netloc.lower().endswith(".br"):
-                continue
-
-            data_text = "N/D"
-            try:
-                data_parent = a_el.find_element(By.XPATH, ".//ancestor::*[self::div or self::article][1]")
-                spans = data_parent.find_elements(By.XPATH, ".//span|.//time")
-                for sp in spans:
-                    txt = (sp.get_attribute("aria-label") or sp.text or "").strip()
-                    if not txt:
-                        continue
-                    if re.match(r"^há\s+\d+\s+(minuto|hora|dia|semana|m[eê]s|ano)s?$", txt, flags=re.IGNORECASE):
-                        data_text = txt; break
-                    if re.match(r"^\d{2}/\d{2}/\d{4}$", txt):
-                        data_text = txt; break
-                    if re.search(r"\d", txt) and any(w in txt.lower() for w in ("há","min","hora","dia","semana","mês","mes","ano")):
-                        data_text = txt; break
-            except Exception:
-                pass
-
-            links.append((href, data_text))
-        except Exception:
+    for href, _y, datas in raw_items:
+        if href.startswith("/"):
+            href = urljoin("https://www.google.com", href)
+        if excluir_br and urlparse(href).netloc.lower().endswith(".br"):
             continue
+        links.append((href, _data_dos_textos(datas or [])))
 
     log(f"[DEBUG] {len(links)} links recolhidos.")
     if not links:
@@ -344,113 +395,252 @@ def write_result_immediately(result):
 # -------------------------------------------------------------
 # Visitar links por HTTP (rápido e com baixo uso de memória)
 # -------------------------------------------------------------
-SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
-STYLE_RE = re.compile(r"<style\b[^>]*>.*?</style>", re.IGNORECASE | re.DOTALL)
-TAG_RE = re.compile(r"<[^>]+>")
-
-def _extract_text_from_html(html, max_chars=TEXT_MAX_CHARS):
-    try:
-        html = SCRIPT_RE.sub(" ", html)
-        html = STYLE_RE.sub(" ", html)
-        text = TAG_RE.sub(" ", html)
-        text = re.sub(r"\s+", " ", text).strip()
-        if len(text) > max_chars:
-            return text[:max_chars]
-        return text
-    except Exception:
-        return ""
-
-def _http_fetch_text(session, url, timeout_connect, timeout_read, max_bytes, headers):
-    with session.get(url, timeout=(timeout_connect, timeout_read), stream=True, headers=headers, allow_redirects=True) as resp:
+_sessao_http = None
+_sessao_http_lock = threading.Lock()
+_stats_http_anterior = (0, 0)
+
+def obter_sessao_http():
+    """
+    Sessão requests partilhada pelo processo (keywords e runs). As ligações ficam em
+    keep-alive num pool por domínio, por isso pedidos repetidos ao mesmo site
+    reutilizam a ligação TCP/TLS já aberta.
+    """
+    global _sessao_http
+    with _sessao_http_lock:
+        if _sessao_http is None:
+            session = requests.Session()
+            session.headers.update({"User-Agent": USER_AGENT})
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_PER_HOST)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessao_http = session
+        return _sessao_http
+
+def estatisticas_pool_http():
+    """(pedidos, ligações novas, domínios em pool) somados sobre os pools urllib3 ativos."""
+    if _sessao_http is None:
+        return 0, 0, 0
+    pedidos = novas = hosts = 0
+    for adapter in set(_sessao_http.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            pedidos += pool.num_requests
+            novas += pool.num_connections
+    return pedidos, novas, hosts
+
+def log_pool_http(contexto=""):
+    """Log dos pedidos servidos por ligações reutilizadas (hit) vs. novas (miss) desde o último log."""
+    global _stats_http_anterior
+    pedidos, novas, hosts = estatisticas_pool_http()
+    d_pedidos = pedidos - _stats_http_anterior[0]
+    d_novas = novas - _stats_http_anterior[1]
+    _stats_http_anterior = (pedidos, novas)
+    hits = max(0, d_pedidos - d_novas)
+    log(f"[HTTP-POOL] {contexto} pedidos={d_pedidos} | reutilizadas={hits} | novas={d_novas} | "
+        f"domínios em pool={hosts} | acumulado {pedidos - novas}/{pedidos} reutilizados")
+
+def fechar_sessao_http():
+    global _sessao_http
+    with _sessao_http_lock:
+        if _sessao_http is not None:
+            try:
+                _sessao_http.close()
+            except Exception:
+                pass
+            _sessao_http = None
+
+atexit.register(fechar_sessao_http)
+
+def _leitor_de_cache(entrada, keyword, max_bytes):
+    leitor = LeitorArtigo(keyword, encoding=encoding_da_resposta(entrada.content_type, entrada.corpo[:4096]),
+                          max_chars=TEXT_MAX_CHARS)
+    for i in range(0, min(len(entrada.corpo), max_bytes), 8192):
+        leitor.feed_bytes(entrada.corpo[i:i + 8192])
+        if leitor.completo:
+            return leitor
+    leitor.feed_bytes(b"", final=True)
+    return leitor
+
+def _http_ler_artigo(session, url, timeout_connect, timeout_read, max_bytes, headers, keyword):
+    """
+    Descarrega o artigo em streaming para um LeitorArtigo: o texto é analisado aos
+    bocados e o download pára logo que há título, match e o <head> completo (ou ao
+    atingir max_bytes).
+    Passa pela cache HTTP em disco: entradas frescas não vão à rede, as outras são
+    revalidadas com ETag/Last-Modified. Uma entrada parcial (download parado cedo)
+    só serve se o match estiver na parte guardada.
+    """
+    cache = obter_cache()
+    entrada = cache.obter(url) if cache else None
+    if entrada is not None and entrada.fresca:
+        leitor = _leitor_de_cache(entrada, keyword, max_bytes)
+        if leitor.completo or entrada.completo:
+            cache.hit()
+            return leitor
+
+    pedido_headers = dict(headers)
+    if entrada is not None:
+        pedido_headers.update(entrada.cabecalhos_condicionais())
+
+    with session.get(url, timeout=(timeout_connect, timeout_read), stream=True, headers=pedido_headers, allow_redirects=True) as resp:
         status = resp.status_code
+        if status == 304 and entrada is not None:
+            cache.renovar(url)
+            cache.hit(revalidado=True)
+            return _leitor_de_cache(entrada, keyword, max_bytes)
         if status >= 400:
             raise RuntimeError(f"HTTP {status}")
-        encoding = resp.encoding or "utf-8"
-        total = 0
-        chunks = []
-        for chunk in resp.iter_content(chunk_size=8192):
+        content_type = resp.headers.get("Content-Type", "")
+        leitor = None
+        lidos = [] if cache else None
+        parou_cedo = False
+        chunks = resp.iter_content(chunk_size=8192)
+        for chunk in chunks:
             if not chunk:
                 continue
-            chunks.append(chunk)
-            total += len(chunk)
-            if total >= max_bytes:
+            if leitor is None:
+                leitor = LeitorArtigo(keyword, encoding=encoding_da_resposta(content_type, chunk), max_chars=TEXT_MAX_CHARS)
+            if lidos is not None:
+                lidos.append(chunk)
+            leitor.feed_bytes(chunk)
+            if leitor.bytes >= max_bytes:
                 break
-        data = b"".join(chunks)
-        try:
-            html = data.decode(encoding, errors="ignore")
-        except Exception:
-            html = data.decode("utf-8", errors="ignore")
-        return html
+            if leitor.completo:
+                parou_cedo = True
+                break
+        if parou_cedo:
+            # Fechar a resposta a meio fecha o socket; se o resto do corpo for curto lê-se
+            # até ao fim para a ligação voltar ao pool keep-alive (e a cache fica completa).
+            drenados = 0
+            for chunk in chunks:
+                drenados += len(chunk)
+                if lidos is not None:
+                    lidos.append(chunk)
+                if drenados > HTTP_DRAIN_MAX_BYTES:
+                    break
+            else:
+                parou_cedo = False
+        if leitor is None:
+            leitor = LeitorArtigo(keyword, max_chars=TEXT_MAX_CHARS)
+        elif not leitor.completo:
+            leitor.feed_bytes(b"", final=True)
+
+        if cache and status == 200 and lidos and (not content_type or "html" in content_type.lower()):
+            cache.guardar(url, b"".join(lidos), content_type, resp.headers.get("ETag"),
+                          resp.headers.get("Last-Modified"), completo=not parou_cedo)
+        return leitor
+
+def _visitar_link_http(idx, total, href, data_pub, keyword, session, headers):
+    start_t = time.time()
+    dominio = urlparse(href).netloc or "site"
+    log(f"[DEBUG] ({idx}/{total}) HTTP -> {dominio}")
+    try:
+        leitor = _http_ler_artigo(
+            session=session,
+            url=href,
+            timeout_connect=HTTP_CONNECT_TIMEOUT,
+            timeout_read=HTTP_READ_TIMEOUT,
+            max_bytes=HTTP_MAX_BYTES,
+            headers=headers,
+            keyword=keyword
+        )
+        if time.time() - start_t > MAX_SECONDS_PER_LINK:
+            log(f"[DEBUG] ({idx}/{total}) TIMEOUT após {int(time.time()-start_t)}s.")
+            return {
+                "link": href,
+                "titulo": "Timeout",
+                "site": dominio,
+                "status": "ERRO",
+                "data": data_pub,
+                "erro": f"TIMEOUT {int(time.time()-start_t)}s"
+            }
 
-def visitar_links_http(links, keyword, resultados, session):
-    log(f"[DEBUG] A visitar {len(links)} links (HTTP)...")
-    kw_lower = (keyword or "").lower()
+        meta = leitor.metadados()
+        titulo = meta["manchete"] or leitor.titulo or "Sem título"
+        encontrou = leitor.encontrou
+
+        log(f"[DEBUG] ({idx}/{total}) {dominio} | {'ENCONTRADA' if encontrou else 'NÃO ENCONTRADA'} | "
+            f"{int(time.time()-start_t)}s | {leitor.bytes // 1024} KB")
+        return {
+            "link": href,
+            "titulo": titulo,
+            "site": dominio,
+            "status": "ENCONTRADA" if encontrou else "NÃO ENCONTRADA",
+            "data": data_pub,
+            **meta
+        }
+
+    except Exception as e:
+        # Qualquer erro -> regista e SALTA logo para o próximo sem esperar
+        log(f"[ERRO visitar_link_http] ({idx}/{total}): {e}")
+        return {
+            "link": href,
+            "titulo": "Erro",
+            "site": dominio,
+            "status": "ERRO",
+            "data": data_pub,
+            "erro": str(e)
+        }
+
+def visitar_links_http(links, keyword, resultados, session, indice=None):
+    """
+    Visita os links da SERP em paralelo (HTTP_CONCURRENCY no total, HTTP_PER_HOST por
+    domínio). Os resultados entram em `resultados` e no JSONL pela ordem da SERP, assim
+    que todos os anteriores estiverem prontos. Com `indice` (IndiceDedup da run), um
+    artigo já visitado para esta keyword não volta a ser pedido.
+    """
+    log(f"[DEBUG] A visitar {len(links)} links (HTTP, {HTTP_CONCURRENCY} em paralelo)...")
     headers = {
         "User-Agent": USER_AGENT,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "pt-PT,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Connection": "close",
     }
-
-    for idx, (href, data_pub) in enumerate(links, start=1):
-        start_t = time.time()
-        dominio = urlparse(href).netloc or "site"
-        log(f"[DEBUG] ({idx}/{len(links)}) HTTP -> {dominio}")
-        try:
-            html = _http_fetch_text(
-                session=session,
-                url=href,
-                timeout_connect=HTTP_CONNECT_TIMEOUT,
-                timeout_read=HTTP_READ_TIMEOUT,
-                max_bytes=HTTP_MAX_BYTES,
-                headers=headers
-            )
-            if time.time() - start_t > MAX_SECONDS_PER_LINK:
-                result = {
-                    "link": href,
-                    "titulo": "Timeout",
-                    "site": dominio,
-                    "status": "ERRO",
-                    "data": data_pub,
-                    "erro": f"TIMEOUT {int(time.time()-start_t)}s"
-                }
+    total = len(links)
+    por_host = {}
+    por_host_lock = threading.Lock()
+
+    def tarefa(idx, href, data_pub):
+        anterior = indice.resultado(href, keyword) if indice is not None else None
+        if anterior:
+            log(f"[DEBUG] ({idx}/{total}) Já visitado nesta run -> {anterior['link']}")
+            return dict(anterior)
+        host = urlparse(href).netloc.lower()
+        with por_host_lock:
+            sem = por_host.setdefault(host, threading.Semaphore(max(1, HTTP_PER_HOST)))
+        with sem:
+            result = _visitar_link_http(idx, total, href, data_pub, keyword, session, headers)
+        if indice is not None and result["status"] != "ERRO":
+            indice.registar(href, keyword, result)
+            if result.get("url_canonica"):
+                indice.registar(result["url_canonica"], keyword, result)
+        return result
+
+    t0 = time.time()
+    prontos = {}
+    proximo = 0
+    with ThreadPoolExecutor(max_workers=max(1, HTTP_CONCURRENCY), thread_name_prefix="serp-http") as pool:
+        futuros = {
+            pool.submit(tarefa, idx, href, data_pub): idx - 1
+            for idx, (href, data_pub) in enumerate(links, start=1)
+        }
+        for fut in as_completed(futuros):
+            prontos[futuros[fut]] = fut.result()
+            # escoa o prefixo contínuo já concluído, preservando a ordem da SERP
+            while proximo in prontos:
+                result = prontos.pop(proximo)
                 resultados.append(result)
                 write_result_immediately(result)
-                log(f"[DEBUG] ({idx}/{len(links)}) TIMEOUT após {int(time.time()-start_t)}s.")
-                continue
-
-            title_match = re.search(r"<title[^>]*>(.*?)</title>", html, flags=re.IGNORECASE | re.DOTALL)
-            titulo = re.sub(r"\s+", " ", title_match.group(1)).strip() if title_match else "Sem título"
-
-            texto = _extract_text_from_html(html, max_chars=TEXT_MAX_CHARS)
-            encontrou = kw_lower in (texto.lower() if texto else "")
-
-            result = {
-                "link": href,
-                "titulo": titulo,
-                "site": dominio,
-                "status": "ENCONTRADA" if encontrou else "NÃO ENCONTRADA",
-                "data": data_pub
-            }
-            resultados.append(result)
-            write_result_immediately(result)
-            log(f"[DEBUG] ({idx}/{len(links)}) {dominio} | {'ENCONTRADA' if encontrou else 'NÃO ENCONTRADA'} | {int(time.time()-start_t)}s")
-
-        except Exception as e:
-            # Qualquer erro -> regista e SALTA logo para o próximo sem esperar
-            result = {
-                "link": href,
-                "titulo": "Erro",
-                "site": dominio,
-                "status": "ERRO",
-                "data": data_pub,
-                "erro": str(e)
-            }
-            resultados.append(result)
-            write_result_immediately(result)
-            log(f"[ERRO visitar_link_http] ({idx}/{len(links)}): {e}")
-        finally:
-            gc.collect()
+                proximo += 1
+    log(f"[DEBUG] {total} links visitados em {time.time() - t0:.1f}s.")
+    log_pool_http(f"kw='{keyword}'")
+    cache = obter_cache()
+    if cache:
+        log(f"[HTTP-CACHE] {cache.resumo()}")
+    gc.collect()
 
 # -------------------------------------------------------------
 # Paginação da SERP (robusta)
@@ -513,10 +703,9 @@ def proxima_pagina(driver):
         return False
 
 # -------------------------------------------------------------
-# Execução principal
+# Driver reutilizado entre keywords
 # -------------------------------------------------------------
-def executar_scraper_google(keyword, filtro_tempo):
-    log("[DEBUG] A iniciar o scraper do Google (leve e rápido).")
+def criar_driver():
     options = uc.ChromeOptions()
     options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
@@ -551,23 +740,90 @@ def executar_scraper_google(keyword, filtro_tempo):
     driver.set_page_load_timeout(PAGELOAD_TIMEOUT)
     driver.set_script_timeout(SCRIPT_TIMEOUT)
     driver.set_window_size(1120, 640)
+    return driver
+
+class GestorDriver:
+    """
+    Mantém um uc.Chrome quente entre keywords (arrancar e patchar o Chrome custa 3-8s).
+    O consentimento do Google fica nos cookies do driver (só é tratado quando a SERP
+    mostra a parede de consentimento); o driver é reciclado após
+    DRIVER_MAX_KEYWORDS keywords ou quando uma keyword termina em erro.
+    Uso exclusivo: uma keyword de cada vez (lock).
+    """
+
+    def __init__(self, max_keywords=DRIVER_MAX_KEYWORDS):
+        self.max_keywords = max_keywords
+        self.driver = None
+        self.keywords = 0
+        self._lock = threading.RLock()
+
+    def _vivo(self):
+        if self.driver is None:
+            return False
+        try:
+            _ = self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _obter(self):
+        if not self._vivo():
+            self.reciclar()
+            t0 = time.time()
+            self.driver = criar_driver()
+            log(f"[DEBUG] Chrome lançado em {time.time() - t0:.1f}s.")
+        return self.driver
+
+    def reciclar(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            log(f"[DEBUG] A reciclar o Chrome após {self.keywords} keyword(s).")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            gc.collect()
+        self.keywords = 0
 
-    resultados = []
-    session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
-    try:
-        open_url_with_timeout(driver, "https://www.google.com/ncr", soft_wait=0.3)
-        aceitar_cookies_google(driver, time_budget_s=(2 if FAST_MODE else 4))
+    @contextmanager
+    def usar(self):
+        with self._lock:
+            erro = False
+            try:
+                yield self._obter()
+            except Exception:
+                erro = True
+                raise
+            finally:
+                self.keywords += 1
+                if erro or (self.max_keywords and self.keywords >= self.max_keywords):
+                    self.reciclar()
 
-        abrir_pesquisa_google(driver, keyword)
-        aplicar_filtro_tempo_por_url(driver, filtro_tempo)
+_gestor_driver = GestorDriver()
 
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@role='heading']"))
-            )
-        except Exception:
-            pass
+def fechar_driver_google():
+    with _gestor_driver._lock:
+        _gestor_driver.reciclar()
+
+atexit.register(fechar_driver_google)
+
+# -------------------------------------------------------------
+# Execução principal
+# -------------------------------------------------------------
+def executar_scraper_google(keyword, filtro_tempo, indice=None):
+    """
+    `indice` (IndiceDedup) partilha os artigos já visitados entre chamadas da mesma run
+    (várias keywords/clientes); sem ele cada chamada usa um índice próprio.
+    """
+    with _gestor_driver.usar() as driver:
+        return _executar_scraper_google(driver, keyword, filtro_tempo, indice if indice is not None else IndiceDedup())
+
+def _executar_scraper_google(driver, keyword, filtro_tempo, indice):
+    log("[DEBUG] A iniciar o scraper do Google (leve e rápido).")
+    resultados = []
+    session = obter_sessao_http()
+    try:
+        abrir_pesquisa_google(driver, keyword, filtro_tempo)
 
         page_index = 1
         empty_pages = 0
@@ -581,16 +837,19 @@ def executar_scraper_google(keyword, filtro_tempo):
 
             links = coletar_links_noticias(driver, excluir_br=False)
 
-            # Filtra duplicados entre páginas; se não houver novos, conta como página vazia
+            # Filtra duplicados entre páginas (redirects, AMP, tracking, m./www. contam como o
+            # mesmo artigo); se não houver novos, conta como página vazia
             new_links = []
             for href, data_pub in links:
-                if href not in seen_links:
-                    seen_links.add(href)
+                href = limpar_url(href)
+                chave = chave_canonica(href)
+                if chave not in seen_links:
+                    seen_links.add(chave)
                     new_links.append((href, data_pub))
 
             if new_links:
                 empty_pages = 0  # reset contador de páginas vazias
-                visitar_links_http(new_links, keyword, resultados, session)
+                visitar_links_http(new_links, keyword, resultados, session, indice)
             else:
                 empty_pages += 1
                 log(f"[DEBUG] Página sem novos links ({empty_pages}/{MAX_EMPTY_SERP_PAGES}).")
@@ -609,14 +868,6 @@ def executar_scraper_google(keyword, filtro_tempo):
             page_index += 1
 
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
-        try:
-            session.close()
-        except Exception:
-            pass
         gc.collect()
 
     return resultados
@@ -624,10 +875,11 @@ def executar_scraper_google(keyword, filtro_tempo):
 def rodar_scraper_sequencial(keywords_string, filtro_tempo):
     all_results = []
     keywords = [kw.strip() for kw in keywords_string.split(",") if kw.strip()]
+    indice = IndiceDedup()
     for kw in keywords:
         log(f"[DEBUG] A processar keyword: '{kw}'")
         try:
-            res = executar_scraper_google(kw, filtro_tempo)
+            res = executar_scraper_google(kw, filtro_tempo, indice)
             if RESULTS_JSONL_PATH:
                 all_results.extend(res[-3:])  # manter leve
             else:
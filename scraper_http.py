@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+from typing import List
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+# Mesmas variáveis de ambiente que o scraper_google usa para limitar downloads
+HTTP_CONNECT_TIMEOUT = int(os.getenv("HTTP_CONNECT_TIMEOUT", "4") or "4")
+HTTP_READ_TIMEOUT = int(os.getenv("HTTP_READ_TIMEOUT", os.getenv("MAX_SECONDS_PER_LINK", "7")) or "7")
+HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", str(1_500_000)) or "1500000")
+TEXT_MAX_CHARS = int(os.getenv("TEXT_MAX_CHARS", str(80_000)) or "80000")
+SHELL_MIN_TEXT_CHARS = int(os.getenv("SHELL_MIN_TEXT_CHARS", "400"))  # abaixo disto o HTML é tratado como casca JS
+
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-PT,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+# Mesma ordem de preferência que ANALISAR_ARTIGO_JS no scraper.py
+SELETORES_CORPO = [
+    'article',
+    'div[class*="content"]',
+    'div[class*="article"]',
+    'div[id*="content"]',
+    'section[class*="content"]',
+    'main'
+]
+SELETORES_TITULO = [
+    "h1",
+    "header h1",
+    "article h1",
+    "section h1",
+    "div[class*='title'] h1",
+    "div[class*='header'] h1",
+    "meta[property='og:title']",
+    "title"
+]
+SELETORES_APP_ROOT = "body > div#root, body > div#app, body > div#__next, body > div#__nuxt"
+
+logger = logging.getLogger("scraper")
+
+
+def nova_sessao() -> aiohttp.ClientSession:
+    timeout = aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT,
+                                    total=HTTP_CONNECT_TIMEOUT + HTTP_READ_TIMEOUT)
+    return aiohttp.ClientSession(timeout=timeout, headers=HTTP_HEADERS)
+
+
+async def obter_html(session: aiohttp.ClientSession, url: str, max_bytes: int = HTTP_MAX_BYTES):
+    """GET com limite de bytes. Devolve (url_final, html) ou (url, None) em erro/não-HTML."""
+    url_final, _, html = await obter_pagina(session, url, max_bytes)
+    return url_final, html
+
+
+async def obter_pagina(session: aiohttp.ClientSession, url: str, max_bytes: int = HTTP_MAX_BYTES):
+    """Como obter_html, mas devolve (url_final, status, html); status None se o pedido falhou."""
+    try:
+        async with session.get(url, allow_redirects=True, ssl=False) as resp:
+            if resp.status >= 400:
+                logger.info(f"[HTTP] {url} -> HTTP {resp.status}")
+                return str(resp.url), resp.status, None
+            ctype = resp.headers.get("Content-Type", "")
+            if ctype and "html" not in ctype and "xml" not in ctype:
+                return str(resp.url), resp.status, None
+            chunks = []
+            total = 0
+            async for chunk in resp.content.iter_chunked(8192):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total >= max_bytes:
+                    break
+            data = b"".join(chunks)
+            try:
+                encoding = resp.get_encoding()
+            except Exception:
+                encoding = "utf-8"
+            try:
+                return str(resp.url), resp.status, data.decode(encoding, errors="ignore")
+            except Exception:
+                return str(resp.url), resp.status, data.decode("utf-8", errors="ignore")
+    except Exception as e:
+        logger.info(f"[HTTP] Falha a obter {url}: {e}")
+        return url, None, None
+
+
+def extrair_ancoras_html(html: str) -> List[list]:
+    """
+    Devolve [href, texto, y] no mesmo formato de recolher_ancoras. Sem layout não há y;
+    âncoras dentro de header/nav recebem y=0 para serem afastadas como o header fixo.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    out = []
+    for a in soup.find_all("a", href=True):
+        y = 0 if a.find_parent(["header", "nav"]) else None
+        out.append([a["href"], a.get_text(" ", strip=True), y])
+    return out
+
+
+def analisar_html_artigo(html: str, keyword: str) -> dict:
+    """
+    Título, seletor do corpo, texto (limitado) e match da keyword a partir do HTML estático.
+    shell_js=True quando a página é claramente montada por JavaScript (pouco texto
+    servido, app root vazio ou noscript a pedir JS) e precisa de um browser.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    pede_js = any("javascript" in ns.get_text(" ", strip=True).lower() for ns in soup.find_all("noscript"))
+    app_root = soup.select_one(SELETORES_APP_ROOT)
+    app_root_vazio = app_root is not None and not app_root.get_text(strip=True)
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+
+    titulo = None
+    for seletor in SELETORES_TITULO:
+        el = soup.select_one(seletor)
+        if not el:
+            continue
+        valor = el.get("content") if el.name == "meta" else el.get_text(" ", strip=True)
+        if valor and len(valor.strip()) > 5:
+            titulo = re.sub(r"\s+", " ", valor).strip()
+            break
+
+    corpo_sel = "body"
+    corpo = None
+    for seletor in SELETORES_CORPO:
+        corpo = soup.select_one(seletor)
+        if corpo is not None:
+            corpo_sel = seletor
+            break
+    kw = (keyword or "").lower()
+    texto_sel = re.sub(r"\s+", " ", corpo.get_text(" ", strip=True))[:TEXT_MAX_CHARS] if corpo is not None else ""
+    match_sel = bool(kw) and kw in texto_sel.lower()
+    texto_body = ""
+    if not match_sel and soup.body is not None:
+        texto_body = re.sub(r"\s+", " ", soup.body.get_text(" ", strip=True))[:TEXT_MAX_CHARS]
+    match_body = (not match_sel) and bool(kw) and kw in texto_body.lower()
+
+    texto_total = len(soup.body.get_text(" ", strip=True)) if soup.body is not None else 0
+    shell_js = texto_total < SHELL_MIN_TEXT_CHARS or app_root_vazio or (pede_js and texto_total < 4 * SHELL_MIN_TEXT_CHARS)
+
+    return {
+        "titulo": titulo,
+        "corpo_sel": corpo_sel,
+        "texto": texto_sel or texto_body,
+        "match_sel": match_sel,
+        "match_body": match_body,
+        "shell_js": shell_js,
+    }
@@ -0,0 +1,103 @@
+import hashlib
+import re
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlunparse
+
+PARAMS_TRACKING = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ocid", "cmpid", "ref_src", "ref_url", "_ga", "_gl", "xtor", "s_cid", "guccounter",
+    "guce_referrer", "guce_referrer_sig", "__twitter_impression",
+}
+PREFIXOS_TRACKING = ("utm_", "pk_", "hsa_", "ns_")
+SUBDOMINIOS_VARIANTES = ("www.", "m.", "mobile.", "amp.")  # variantes do mesmo site na chave
+AMP_PATH_RE = re.compile(r"(?:/amp/?|\.amp|/amp\.html?)$", re.IGNORECASE)
+GOOGLE_HOST_RE = re.compile(r"^(www\.)?google\.[a-z.]+$")
+
+
+def desembrulhar(url: str) -> str:
+    """Tira os wrappers de redirect do Google (/url?q=, /amp/s/) e da cache AMP (cdn.ampproject.org)."""
+    for _ in range(3):  # wrappers encadeados
+        p = urlparse(url)
+        host = (p.hostname or "").lower()
+        if GOOGLE_HOST_RE.match(host) and p.path == "/url":
+            qs = dict(parse_qsl(p.query))
+            destino = qs.get("q") or qs.get("url")
+            if destino and destino.startswith(("http://", "https://")):
+                url = destino
+                continue
+        if GOOGLE_HOST_RE.match(host) and p.path.startswith("/amp/s/"):
+            url = "https://" + unquote(p.path[len("/amp/s/"):])
+            continue
+        m = re.match(r"^/[a-z]/(s/)?(.+)$", p.path)
+        if host.endswith(".cdn.ampproject.org") and m:
+            url = ("https://" if m.group(1) else "http://") + m.group(2) + ("?" + p.query if p.query else "")
+            continue
+        break
+    return url
+
+
+def _tracking(nome: str) -> bool:
+    n = nome.lower()
+    return n in PARAMS_TRACKING or n.startswith(PREFIXOS_TRACKING)
+
+
+def limpar_url(url: str) -> str:
+    """URL para pedir: sem wrappers de redirect, sem parâmetros de tracking e sem fragmento."""
+    p = urlparse(desembrulhar((url or "").strip()))
+    if not p.scheme or not p.netloc:
+        return url
+    query = urlencode([(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not _tracking(k)])
+    return urlunparse((p.scheme.lower(), p.netloc.lower(), p.path or "/", p.params, query, ""))
+
+
+def chave_canonica(url: str) -> str:
+    """
+    Chave de deduplicação de um artigo: URL limpo, sem esquema, host sem variantes
+    www/m/amp, sem caminhos AMP, sem barra final e com a query ordenada.
+    """
+    p = urlparse(limpar_url(url))
+    host = (p.hostname or "").lower()
+    for prefixo in SUBDOMINIOS_VARIANTES:
+        if host.startswith(prefixo) and host.count(".") >= 2:
+            host = host[len(prefixo):]
+            break
+    path = p.path or "/"
+    if path.lower().startswith("/amp/"):
+        path = path[4:]
+    path = AMP_PATH_RE.sub("", path).rstrip("/") or "/"
+    params = [
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if not (k.lower() == "amp" or (k.lower() in ("outputtype", "output") and v.lower() == "amp"))
+    ]
+    query = urlencode(sorted(params))
+    return host + path + ("?" + query if query else "")
+
+
+def hash_url(url: str) -> str:
+    """sha1 da chave canónica: coluna url_chave (UNIQUE) de noticias_sugeridas."""
+    return hashlib.sha1(chave_canonica(url).encode("utf-8")).hexdigest()
+
+
+class IndiceDedup:
+    """
+    Índice de artigos de uma run (partilhado entre keywords e clientes), por chave
+    canónica. Guarda o resultado já obtido para cada (artigo, keyword), para que
+    cada artigo seja pedido uma vez por keyword; entre keywords o corpo vem da cache HTTP.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resultados: Dict[str, Dict[str, dict]] = {}
+
+    def resultado(self, url: str, keyword: str) -> Optional[dict]:
+        with self._lock:
+            return self._resultados.get(chave_canonica(url), {}).get((keyword or "").lower())
+
+    def registar(self, url: str, keyword: str, result: dict):
+        with self._lock:
+            self._resultados.setdefault(chave_canonica(url), {})[(keyword or "").lower()] = result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._resultados)
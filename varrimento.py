@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from database import fechar_ligacao, get_connection
+from receitas_pesquisa import chave_dominio
+from scraper import executar_scraper
+
+SWEEP_MAX_CONCURRENT = int(os.getenv("SWEEP_MAX_CONCURRENT", "6"))      # sites a correr em paralelo no total
+SWEEP_PER_DOMAIN = int(os.getenv("SWEEP_PER_DOMAIN", "1"))              # pesquisas em paralelo no mesmo domínio
+SWEEP_SITE_BUDGET_S = float(os.getenv("SWEEP_SITE_BUDGET_S", "90"))     # tempo máximo por site+keyword
+
+logger = logging.getLogger("scraper")
+
+
+def medias_do_cliente(cliente_id: int) -> List[Dict]:
+    """Medias (id, nome, url) do cliente com URL preenchido. Nunca lança."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, nome, url FROM media WHERE cliente_id = %s AND url IS NOT NULL AND url <> '' ORDER BY tier, id",
+            (cliente_id,)
+        )
+        return [{"media_id": r[0], "nome": r[1], "url": r[2]} for r in cursor.fetchall()]
+    except Exception as e:
+        logger.warning(f"[SWEEP] Falha a ler medias do cliente {cliente_id}: {e}")
+        return []
+    finally:
+        fechar_ligacao(conn, cursor)
+
+
+async def varrer_cliente(cliente_id: int, keywords: List[str], max_results: int = 3,
+                         progresso: Optional[Callable[[int, int, str, int], None]] = None) -> Dict:
+    """
+    Corre executar_scraper para cada (media do cliente, keyword) com limite global
+    (SWEEP_MAX_CONCURRENT), limite por domínio (SWEEP_PER_DOMAIN) e orçamento de tempo
+    por site (SWEEP_SITE_BUDGET_S). progresso(feitos, total, site, n_resultados) é
+    chamado no fim de cada job.
+
+    Devolve {"resultados": [...], "sites": [...]}: os resultados agregados (sem URLs
+    repetidos) e o estado de cada job ("ok", "timeout" ou "erro").
+    """
+    medias = await asyncio.to_thread(medias_do_cliente, cliente_id)
+    keywords = [k.strip() for k in keywords if k and k.strip()]
+    jobs = [(m, kw) for kw in keywords for m in medias]
+    total = len(jobs)
+    if not total:
+        return {"resultados": [], "sites": []}
+
+    global_sem = asyncio.Semaphore(max(1, SWEEP_MAX_CONCURRENT))
+    por_dominio: Dict[str, asyncio.Semaphore] = {}
+    feitos = 0
+    sites = []
+    resultados = []
+    vistos = set()
+    t0 = time.perf_counter()
+    logger.info(f"[SWEEP] cliente={cliente_id} medias={len(medias)} keywords={len(keywords)} jobs={total}")
+
+    async def job(media: Dict, keyword: str):
+        nonlocal feitos
+        dominio = chave_dominio(media["url"])
+        sem_dominio = por_dominio.setdefault(dominio, asyncio.Semaphore(max(1, SWEEP_PER_DOMAIN)))
+        # domínio primeiro: um job à espera do seu domínio não ocupa um lugar global
+        async with sem_dominio, global_sem:
+            t_job = time.perf_counter()
+            estado = "ok"
+            encontrados = []
+            try:
+                encontrados = await asyncio.wait_for(
+                    executar_scraper(media["url"], keyword, max_results, propagar_erros=True),
+                    timeout=SWEEP_SITE_BUDGET_S
+                ) or []
+            except asyncio.TimeoutError:
+                estado = "timeout"
+                logger.warning(f"[SWEEP] {media['url']} kw='{keyword}' excedeu {SWEEP_SITE_BUDGET_S:.0f}s")
+            except Exception as e:
+                estado = "erro"
+                logger.warning(f"[SWEEP] {media['url']} kw='{keyword}' falhou: {e}")
+
+        novos = 0
+        for titulo, url, site_name in encontrados:
+            if url in vistos:
+                continue
+            vistos.add(url)
+            novos += 1
+            resultados.append({
+                "media_id": media["media_id"], "media": media["nome"], "keyword": keyword,
+                "titulo": titulo, "url": url, "site": site_name,
+            })
+        sites.append({
+            "media_id": media["media_id"], "url": media["url"], "keyword": keyword, "estado": estado,
+            "resultados": novos, "ms": round((time.perf_counter() - t_job) * 1000, 1),
+        })
+        feitos += 1
+        if progresso:
+            try:
+                progresso(feitos, total, media["url"], novos)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(job(m, kw) for m, kw in jobs))
+
+    por_estado = {}
+    for s in sites:
+        por_estado[s["estado"]] = por_estado.get(s["estado"], 0) + 1
+    logger.info(
+        f"[SWEEP] cliente={cliente_id} concluído em {(time.perf_counter() - t0):.1f}s | "
+        f"resultados={len(resultados)} | {por_estado}"
+    )
+    return {"resultados": resultados, "sites": sites}